@@ -46,9 +46,9 @@ import discord
 from discord import app_commands
 from discord.ext.commands import BadArgument
 
-from hyena import Bot
+from hyena import create_bot
 
-bot = Bot()  # dont pass in things here, pass in ./hyena.py
+bot = create_bot()  # dont pass in things here, pass in ./hyena.py
 
 
 @bot.tree.error
@@ -88,8 +88,6 @@ async def app_command_error(
             except:
                 pass
 
-        traceback_embeds = bot.tools.error_to_embed(bot, error)
-
         info_embed = discord.Embed(
             title="Message content",
             description="```\n"
@@ -137,7 +135,7 @@ async def app_command_error(
 
         info_embed.add_field(name="User", value=value)
 
-        await bot.console.send(embeds=[*traceback_embeds, info_embed])
+        await bot.errors.report(error, info_embed)
 
 
 @bot.command(name="load")
@@ -147,6 +145,7 @@ async def load(ctx, cog):
         return await ctx.send("You are not the developer!")
 
     await bot.handle_cog_update(ctx, cog, "load")
+    await _update_other_clusters(ctx, cog, "load")
     bot.logger.info(f"Loaded {cog}")
 
 
@@ -157,6 +156,7 @@ async def unload(ctx, cog):
         return await ctx.send("You are not the developer!")
 
     await bot.handle_cog_update(ctx, cog, "unload")
+    await _update_other_clusters(ctx, cog, "unload")
     bot.logger.info(f"Unloaded {cog}")
 
 
@@ -167,21 +167,77 @@ async def reload(ctx, cog):
         return await ctx.send("You are not the developer!")
 
     await bot.handle_cog_update(ctx, cog, "reload")
+    await _update_other_clusters(ctx, cog, "reload")
     bot.logger.info(f"Reloaded {cog}")
 
 
+async def _update_other_clusters(ctx, cog, _type):
+    """Repeat a load/unload/reload on the other clusters, if there are any"""
+    if bot.ipc is None:
+        return
+
+    results = await bot.ipc.broadcast(
+        "extension", {"cog": cog, "type": _type}, skip_self=True
+    )
+    failed = []
+    for cluster_id, response in results.items():
+        if "error" in response:
+            failed.append(f"Cluster {cluster_id}: {response['error']}")
+        failed.extend(
+            f"Cluster {cluster_id}: {name} : {error}"
+            for name, error in response.get("result") or []
+        )
+
+    if failed:
+        newline = "\n"
+        await ctx.send(f"```\n{newline.join(failed)[:1900]}\n```")
+
+
 @bot.command(name="sync")
 async def _sync(ctx):
     """sync all the slash commands"""
     if ctx.author.id not in bot.owner_ids:
         return await ctx.send("You are not the developer!")
 
-    await bot.tree.sync(guild=discord.Object(bot.config["bot_config"]["guild_id"]))
+    for guild in bot.command_guilds:
+        await bot.tree.sync(guild=guild)
     await ctx.message.add_reaction(bot.success_emoji)
     bot.logger.info(f"Synced slash commands, requested by {str(ctx.author)}")
     print("Synced slash commands, requested by", str(ctx.author))
 
 
+@bot.command(name="loopstats")
+async def loop_stats(ctx, reset: str = None):
+    """What blocked the event loop the longest, `loopstats reset` starts over"""
+    if ctx.author.id not in bot.owner_ids:
+        return await ctx.send("You are not the developer!")
+
+    monitor = bot.loop_monitor
+    if reset == "reset":
+        monitor.reset()
+        return await ctx.message.add_reaction(bot.success_emoji)
+
+    lag = monitor.lag.summary().get("lag", (0, 0.0, 0.0))
+    embed = discord.Embed(color=discord.Colour.green())
+    embed.set_author(name="Event loop", icon_url=bot.tools._get_mem_avatar(bot.user))
+    embed.description = (
+        f"**Lag:** now `{monitor.last_lag * 1000:.1f}ms`, "
+        f"average `{lag[1]:.1f}ms`, worst `{lag[2]:.1f}ms` over {lag[0]} checks\n"
+        f"**Slow callbacks:** longer than `{monitor.threshold * 1000:.0f}ms`"
+    )
+    offenders = monitor.offenders()
+    lines = [
+        f"{count}x avg {average:.0f}ms worst {worst:.0f}ms\n  {place}"
+        for place, count, average, worst in offenders
+    ]
+    embed.add_field(
+        name="Top offenders",
+        value=f"```\n{chr(10).join(lines)[:1000]}\n```" if lines else "None so far",
+        inline=False,
+    )
+    await ctx.send(embed=embed)
+
+
 def cleanup_code(content):
     """Cleanup code blocks"""
     if content.startswith("```") and content.endswith("```"):
@@ -190,6 +246,31 @@ def cleanup_code(content):
     return content.strip("` \n")
 
 
+async def run_code(code, _global_vars):
+    """Runs the code of an eval, returns (succeeded, output)"""
+    code = f"async def code():\n{indent(cleanup_code(code), '    ')}"
+    buf = StringIO()
+
+    try:
+        exec(code, _global_vars)
+    except Exception as e:
+        return False, f"{e.__class__.__name__}: {e}"
+
+    func = _global_vars["code"]
+    try:
+        with redirect_stdout(buf):
+            resp = await func()
+    except Exception as e:
+        return False, f"{buf.getvalue()}{traceback.format_exc()}"
+
+    console = buf.getvalue()
+    if not resp and console:
+        return True, console
+    elif not resp and not console:
+        return True, None
+    return True, f"{console}{resp}"
+
+
 @bot.command(name="eval")
 async def eval_command(ctx, *, code='await ctx.send("Hello World")'):
     """Evaluate a given code"""
@@ -200,35 +281,15 @@ async def eval_command(ctx, *, code='await ctx.send("Hello World")'):
         )
 
         start = default_timer()
-        code = cleanup_code(code)
-        code = f"async def code():\n{indent(code, '    ')}"
-        _global_vars = {"bot": bot, "ctx": ctx, "discord": discord}
-        buf = StringIO()
-
-        try:
-            exec(code, _global_vars)
-        except Exception as e:
-            embed.description = f"```py\n{e.__class__.__name__}: {e}\n```"
-            embed.color = discord.Colour.red()
-        else:
-            func = _global_vars["code"]
-            try:
-                with redirect_stdout(buf):
-                    resp = await func()
-            except Exception as e:
-                console = buf.getvalue()
-                embed.description = f"```py\n{console}{traceback.format_exc()}\n```"
-                embed.color = discord.Colour.red()
-            else:
-                console = buf.getvalue()
-                if not resp and console:
-                    embed.description = f"```py\n{console}\n```"
-                elif not resp and not console:
-                    embed.description = "```<No output>```"
-                else:
-                    embed.description = f"```py\n{console}{resp}\n```"
+        ok, output = await run_code(code, {"bot": bot, "ctx": ctx, "discord": discord})
         stop = default_timer()
 
+        embed.description = (
+            f"```py\n{output}\n```" if output is not None else "```<No output>```"
+        )
+        if not ok:
+            embed.color = discord.Colour.red()
+
         embed.set_footer(
             text="Evaluated in: {:.5f} seconds".format(stop - start),
             icon_url=bot.tools._get_mem_avatar(ctx.author),
@@ -238,5 +299,51 @@ async def eval_command(ctx, *, code='await ctx.send("Hello World")'):
         await ctx.send("Sorry, this is a Developer only command!")
 
 
+async def _ipc_eval(data):
+    ok, output = await run_code(data["code"], {"bot": bot, "discord": discord})
+    return [ok, output]
+
+
+@bot.command(name="evalall")
+async def eval_all_command(ctx, *, code):
+    """Evaluate a given code on every cluster, ctx is not available there"""
+    if ctx.author.id not in bot.owner_ids:
+        return await ctx.send("Sorry, this is a Developer only command!")
+    if bot.ipc is None:
+        return await ctx.send("The bot is not running as a cluster, use eval.")
+
+    embed = discord.Embed(color=discord.Colour.green())
+    embed.set_author(
+        name="Evaluate code on every cluster",
+        icon_url=bot.tools._get_mem_avatar(bot.user),
+    )
+
+    start = default_timer()
+    results = await bot.ipc.broadcast("eval", {"code": code})
+    stop = default_timer()
+
+    for cluster_id, response in results.items():
+        ok, output = response.get("result") or (False, response.get("error"))
+        if not ok:
+            embed.color = discord.Colour.red()
+        embed.add_field(
+            name=f"Cluster {cluster_id}",
+            value=f"```py\n{str(output)[:1000]}\n```"
+            if output is not None
+            else "```<No output>```",
+            inline=False,
+        )
+
+    embed.set_footer(
+        text="Evaluated in: {:.5f} seconds".format(stop - start),
+        icon_url=bot.tools._get_mem_avatar(ctx.author),
+    )
+    await ctx.send(embed=embed)
+
+
+if bot.ipc is not None:
+    bot.ipc.register("eval", _ipc_eval)
+
+
 if __name__ == "__main__":
     bot.run()
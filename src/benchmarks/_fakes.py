@@ -0,0 +1,93 @@
+"""
+Lightweight stand-ins for the discord objects the automod engine reads,
+so the benchmarks can run without a gateway connection.
+"""
+
+import datetime
+import random
+import string
+from types import SimpleNamespace
+
+import yaml
+
+GUILD = SimpleNamespace(id=794467787690344508, name="Benchmark guild")
+PERMISSIONS = SimpleNamespace(
+    administrator=False, manage_guild=False, manage_messages=False
+)
+
+SAMPLES = [
+    "hey everyone, how is it going today?",
+    "check this out https://github.com/Maharaja-Sawai-Man-Singh-Vidyalaya",
+    "THIS IS SO LOUD I CANNOT BELIEVE IT",
+    "join my server discord.gg/abcdef",
+    "<@111111111111111111> <@222222222222222222> look at this",
+    "what a shit take honestly",
+    "lol www.youtube.com/watch?v=90ao4tPDU-E is the intro video",
+]
+
+
+def load_config(**overrides) -> dict:
+    """Loads the example config with the given automod overrides"""
+    with open("../config_example.yml") as f:
+        config = yaml.safe_load(f)
+
+    config["automod_config"].update(overrides)
+    return config
+
+
+class FakeSettings:
+    """`GuildSettings` without a database, every guild gets the config as is"""
+
+    def __init__(self, config: dict):
+        self.config = config
+
+    async def get(self, guild_id: int) -> dict:
+        return self.config
+
+
+def fake_bot(config: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        config=config,
+        owner_ids=config["bot_config"]["owners_id"],
+        user=SimpleNamespace(id=1),
+        cached_messages=[],
+        session=None,
+        _automod_db=None,
+        settings=FakeSettings(config),
+    )
+
+
+def fake_message(content: str, *, author_id: int = 2, channel_id: int = 3):
+    return SimpleNamespace(
+        content=content,
+        guild=GUILD,
+        author=SimpleNamespace(
+            id=author_id, guild_permissions=PERMISSIONS, mention=f"<@{author_id}>"
+        ),
+        channel=SimpleNamespace(id=channel_id, is_nsfw=lambda: False),
+        raw_mentions=[
+            int(x[2:-1])
+            for x in content.split()
+            if x.startswith("<@") and x[2:-1].isdigit()
+        ],
+        attachments=[],
+        edited_at=None,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+def corpus(size: int, *, seed: int = 0, length: int = None) -> list:
+    """Returns `size` synthetic messages, optionally padded to `length` chars"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(size):
+        content = rng.choice(SAMPLES)
+        if length is not None:
+            filler = []
+            while len(content) + sum(len(x) + 1 for x in filler) < length:
+                filler.append(
+                    "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                )
+            content = " ".join([content, *filler])[:length]
+        messages.append(fake_message(content, author_id=i % 50))
+    return messages
@@ -0,0 +1,44 @@
+"""
+Micro-benchmark for the automod engine.
+
+Compares building the engine for every message (the old per-message
+`Automod(bot, message)` behaviour) against the long lived `bot.automod`.
+Run it from the `src` directory:
+
+    python -m benchmarks.automod_engine
+"""
+
+import asyncio
+import time
+
+from benchmarks._fakes import corpus, fake_bot, load_config
+from utils.automod_class import Automod
+
+MESSAGES = 2_000
+
+
+async def _per_message(bot, messages):
+    for message in messages:
+        await Automod(bot).evaluate(message)
+
+
+async def _long_lived(bot, messages):
+    engine = Automod(bot)
+    for message in messages:
+        await engine.evaluate(message)
+
+
+def main():
+    # Network and message cache backed rules are left out, they are not CPU bound.
+    bot = fake_bot(load_config(spam=False, phish=False, nsfw=False))
+    messages = corpus(MESSAGES)
+
+    for name, runner in (("before", _per_message), ("after", _long_lived)):
+        start = time.perf_counter()
+        asyncio.run(runner(bot, messages))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>6}: {MESSAGES / elapsed:>12,.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    main()
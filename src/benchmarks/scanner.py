@@ -0,0 +1,57 @@
+"""
+Benchmark for the single pass message scanner on long (2,000 char) messages.
+
+"before" runs the separate regex passes the automod rules used to do on
+`message.content`, "after" runs `utils.scanner.scan` once, after checking it
+finds the invites of `INVITE_CASES`. Run it from the `src` directory:
+
+    python -m benchmarks.scanner
+"""
+
+import re
+import time
+
+from benchmarks._fakes import corpus
+from utils.scanner import URL_PATTERN, scan
+
+MESSAGES = 5_000
+LENGTH = 2_000
+
+INVITE_REGEX = re.compile(
+    r"(https://www\.|https://|www\.)?(discord.gg|discord.com/invite|dis.gd/invite|dsc.io|dsc.gg|invite.gg)/[a-zA-z0-9_-]"
+)
+URL_REGEX = "(?i)" + URL_PATTERN
+MENTION_REGEX = re.compile(r"<@!?([0-9]{15,20})>")
+INVITE_CASES = (  # content -> invite codes `scan` must find, checked before timing
+    ("join discord.gg/a", ("a",)),
+    ("||discord.gg/abc|| and **discord.gg/xyz**", ("abc", "xyz")),
+)
+
+
+def _separate_passes(content: str):
+    upper = sum(1 for char in content if char.isupper())
+    invite = INVITE_REGEX.search(content)
+    mentions = [int(x) for x in MENTION_REGEX.findall(content)]
+    if re.search(URL_REGEX, content):  # is_phish_url
+        pass
+    urls = [x[0] for x in re.findall(URL_REGEX, content)]  # is_nsfw
+    return upper, invite, mentions, urls
+
+
+def main():
+    for content, invites in INVITE_CASES:
+        found = scan(content).invites
+        assert found == invites, f"{content!r}: {found} != {invites}"
+
+    contents = [message.content for message in corpus(MESSAGES, length=LENGTH)]
+
+    for name, runner in (("before", _separate_passes), ("after", scan)):
+        start = time.perf_counter()
+        for content in contents:
+            runner(content)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>6}: {MESSAGES / elapsed:>10,.0f} messages/sec ({LENGTH} chars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark for the wordlist matcher used by `Automod.is_badwords`.
+
+Scans a synthetic corpus of 100k messages with `ProfanityMatcher` and, when
+`better_profanity` is installed, compares it with the old
+`profanity.contains_profanity` check on a sample of the same corpus (it is
+too slow to run over all of it). Run it from the `src` directory:
+
+    python -m benchmarks.wordfilter
+"""
+
+import time
+
+from benchmarks._fakes import corpus
+from utils.automod_class import default_filters
+from utils.wordfilter import ProfanityMatcher
+
+MESSAGES = 100_000
+BASELINE_SAMPLE = 1_000
+
+
+def _rate(check, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        check(message.content)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    words = default_filters()
+    messages = corpus(MESSAGES)
+
+    start = time.perf_counter()
+    matcher = ProfanityMatcher(words)
+    print(
+        f"built matcher for {len(matcher)} terms in {time.perf_counter() - start:.3f}s"
+    )
+
+    hits = sum(1 for message in messages if matcher.search(message.content))
+    print(f"matcher: {_rate(matcher.search, messages):>10,.0f} messages/sec", end=" ")
+    print(f"({hits:,} of {MESSAGES:,} messages matched)")
+
+    try:
+        from better_profanity import profanity
+    except ImportError:
+        return print("better_profanity is not installed, skipping the baseline")
+
+    profanity.load_censor_words(words)
+    sample = messages[:BASELINE_SAMPLE]
+    print(
+        f"better_profanity: {_rate(profanity.contains_profanity, sample):>10,.0f}",
+        end=" ",
+    )
+    print(f"messages/sec (first {BASELINE_SAMPLE:,} messages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Licensed under GNU General Public License v3.0
+
+
+Permissions of this strong copyleft license are
+conditioned on making available complete source
+code of licensed works and modifications, which
+include larger works using a licensed work,
+under the same license. Copyright and license
+notices must be preserved. Contributors provide
+an express grant of patent rights.
+
+Permissions:
+    Commercial use
+    Modification
+    Distribution
+    Patent use
+    Private use
+
+Limitations:
+    Liability
+    Warranty
+
+Conditions:
+    License and copyright notice
+    State changes
+    Disclose source
+    Same license
+
+Kindly check out ../LICENSE
+
+--------
+
+Runs the bot as several processes (clusters), each one running a range of
+the shards, so the work is spread over the CPU cores:
+
+    python cluster.py
+
+The number of processes is `sharding.processes` in the config (one per
+CPU core when not set). Every process is a normal `__main__.py` bot that
+finds its shards and the IPC address in the HYENA_CLUSTER environment
+variable. Crashed clusters are restarted.
+"""
+
+import os
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import logging
+import secrets
+import sys
+
+import aiohttp
+from dotenv import load_dotenv
+
+from hyena import Bot
+from utils import migrations
+from utils.database import Database
+from utils.ipc import IPCServer
+
+load_dotenv()
+
+RESTART_DELAY = 5  # seconds before a crashed cluster is started again
+logger = logging.getLogger("cluster")
+
+
+def shard_ranges(shard_count: int, processes: int) -> list:
+    """Splits the shards in `processes` contiguous, nearly equal ranges"""
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+
+    return ranges
+
+
+async def recommended_shards(token: str) -> int:
+    """The shard count discord recommends for the bot"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+        ) as r:
+            r.raise_for_status()
+            return (await r.json())["shards"]
+
+
+async def migrate_databases() -> None:
+    """Brings the schemas up to date once, before any cluster opens them"""
+    for path, schema in migrations.DATABASES.items():
+        db = await Database(path, readers=0).connect()
+        try:
+            await migrations.migrate(db, schema, logger)
+        finally:
+            await db.close()
+
+
+class Cluster:
+    """One bot process and the shards it runs"""
+
+    def __init__(self, cluster_id: int, shard_ids: list, environment: dict):
+        self.id = cluster_id
+        self.shard_ids = shard_ids
+        self.environment = environment
+        self.process = None
+        self.stopping = False
+
+    async def run(self) -> None:
+        while not self.stopping:
+            logger.info(f"Starting cluster {self.id} with shards {self.shard_ids}")
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, "__main__.py", env=self.environment
+            )
+            code = await self.process.wait()
+            if self.stopping:
+                return
+
+            logger.error(
+                f"Cluster {self.id} exited with {code}, restarting in {RESTART_DELAY}s"
+            )
+            await asyncio.sleep(RESTART_DELAY)
+
+    async def stop(self) -> None:
+        self.stopping = True
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.INFO, format="%(levelname)s:%(name)s:%(asctime)s:%(message)s"
+    )
+    config = Bot._load_config()
+    sharding = config["bot_config"].get("sharding") or {}
+
+    shard_count = sharding.get("shard_count") or await recommended_shards(
+        os.environ["TOKEN"]
+    )
+    processes = min(sharding.get("processes") or os.cpu_count() or 1, shard_count)
+
+    await migrate_databases()
+
+    token = secrets.token_hex(16)
+    server = IPCServer(token, logger=logger)
+    host, port = await server.start()
+
+    clusters = []
+    for cluster_id, shard_ids in enumerate(shard_ranges(shard_count, processes)):
+        cluster = {
+            "id": cluster_id,
+            "shard_ids": shard_ids,
+            "shard_count": shard_count,
+            "ipc_host": host,
+            "ipc_port": port,
+            "ipc_token": token,
+        }
+        environment = {**os.environ, "HYENA_CLUSTER": json.dumps(cluster)}
+        clusters.append(Cluster(cluster_id, shard_ids, environment))
+
+    try:
+        await asyncio.gather(*[cluster.run() for cluster in clusters])
+    finally:
+        await asyncio.gather(*[cluster.stop() for cluster in clusters])
+        await server.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -30,7 +30,7 @@ Conditions:
 Kindly check out ../LICENSE
 """
 
-import json
+import math
 from typing import Optional
 
 import discord
@@ -43,7 +43,6 @@ class ActionLogs(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self._db = self.bot._action_logs_db
         self.category = ["moderation"]
 
     def _format_log(self, guild: discord.Guild, _action: dict, serial: int) -> str:
@@ -90,51 +89,39 @@ class ActionLogs(commands.Cog):
                 "Breh, input an integer [not less than 1]."
             )
 
-        cursor = await self._db.execute(
-            "SELECT * FROM moderation_actions WHERE user_id = ?", (member.id,)
-        )
-        res = await cursor.fetchone()
-        if not res:
-            await interaction.response.send_message(
+        logger = self.bot._action_logger
+        total = await logger._count_actions(interaction.guild.id, member.id)
+        if not total:
+            return await interaction.response.send_message(
                 f"I couldn't find any moderation actions for `{member}`."
             )
-        if res:
-            res = json.loads(res[1])
-            if not res:
-                return await interaction.response.send_message(
-                    f"I couldn't find any moderation actions for `{member}`."
-                )
-
-            chunks = (lambda lst, n: [lst[i : i + n] for i in range(0, len(lst), n)])(
-                res, 5
-            )
 
-            try:
-                req = chunks[page - 1]
-            except IndexError:
-                return await interaction.response.send_message(
-                    "Bruv, that page does not exist moron."
-                )
-
-            _desc_list = []
-            for action in req:
-                _desc_list.append(
-                    self._format_log(interaction.guild, action, res.index(action))
-                )
-            desc = "\n\n".join(_desc_list)
-
-            embed = discord.Embed(
-                color=self.bot._gen_colors(), timestamp=interaction.created_at
-            )
-            embed.set_author(
-                name=f"LOGS | {member}", icon_url=self.bot.tools._get_mem_avatar(member)
+        pages = math.ceil(total / 5)
+        if page > pages:
+            return await interaction.response.send_message(
+                "Bruv, that page does not exist moron."
             )
-            embed.description = f"Total: {len(res)}\n\n{desc}"
-            embed.set_footer(text=f"Page {page}/{len(chunks)}")
 
-            await interaction.response.send_message(embed=embed)
+        offset = (page - 1) * 5
+        req = await logger._get_actions(
+            interaction.guild.id, member.id, limit=5, offset=offset
+        )
+
+        _desc_list = []
+        for serial, action in enumerate(req, start=offset):
+            _desc_list.append(self._format_log(interaction.guild, action, serial))
+        desc = "\n\n".join(_desc_list)
+
+        embed = discord.Embed(
+            color=self.bot._gen_colors(), timestamp=interaction.created_at
+        )
+        embed.set_author(
+            name=f"LOGS | {member}", icon_url=self.bot.tools._get_mem_avatar(member)
+        )
+        embed.description = f"Total: {total}\n\n{desc}"
+        embed.set_footer(text=f"Page {page}/{pages}")
 
-        await cursor.close()
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(
         name="actions-clear", description="Clears the action logs for the given member"
@@ -156,29 +143,20 @@ class ActionLogs(commands.Cog):
         ```
         """
 
-        cursor = await self._db.execute(
-            "SELECT * FROM moderation_actions WHERE user_id = ?", (member.id,)
+        cleared = await self.bot._action_logger._clear_actions(
+            interaction.guild.id, member.id
         )
-        res = await cursor.fetchone()
-        if not res:
+        if not cleared:
             return await interaction.response.send_message(
                 f"I couldn't find any moderation actions for `{member}`."
             )
-        if res:
-            await self._db.execute(
-                "DELETE FROM moderation_actions WHERE user_id = ?", (member.id,)
-            )
-            await interaction.response.send_message(
-                f"Cleared all action logs for {member}. \n**Note:** For warns & some others it will \
-not clear the actual warns, just the logs."
-            )
 
-        await self._db.commit()
-        await cursor.close()
+        await interaction.response.send_message(
+            f"Cleared all action logs for {member}. \n**Note:** For warns & some others it will \
+not clear the actual warns, just the logs."
+        )
 
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        ActionLogs(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(ActionLogs(bot), guilds=bot.command_guilds)
@@ -114,6 +114,4 @@ class Afk(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Afk(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Afk(bot), guilds=bot.command_guilds)
@@ -42,9 +42,6 @@ class Automoderation(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.caps_limit = self.bot.config["automod_config"]["caps_threshold"]
-        self.delete_after = self.bot.config["automod_config"]["delete_message_after"]
-        self.mention_limit = self.bot.config["automod_config"]["mention_limit"]
         self.category = ["moderation"]
         self.last_warned = {}
 
@@ -73,20 +70,21 @@ class Automoderation(commands.Cog):
         /automod-configuration
         ```
         """
-        automod = self.bot.AutomodHandler(self.bot, interaction.message)
+        automod = self.bot.automod
+        rules = await automod.rules_for(interaction.guild.id)
 
         embed = discord.Embed(color=discord.Color.green())
         embed.title = "Automod Setup For {}".format(interaction.guild.name)
         embed.description = f"`Automod Config` for {interaction.guild.name}"
         filters = ["spam", "badwords", "caps", "invites", "phish", "nsfw", "mentions"]
         ignored_channels = [
-            self.bot.get_channel(channel).mention
-            for channel in self.bot.config["automod_config"]["ignored_channels"]
+            channel.mention
+            for channel in map(interaction.guild.get_channel, rules.ignored_channels)
             if channel is not None
         ]
 
         for _filter in filters:
-            status = automod.is_enabled(_filter)
+            status = automod.is_enabled(_filter, rules)
             embed.add_field(
                 name=f"{_filter.title()} Filter",
                 value=self._get_emoji(status),
@@ -96,89 +94,99 @@ class Automoderation(commands.Cog):
         if ignored_channels:
             embed.add_field(name="Ignored Channels", value=", ".join(ignored_channels))
 
+        embed.add_field(
+            name="Phish Cache", value=automod.phish_cache.stats(), inline=False
+        )
+
+        timings = [
+            f"{stage}: {avg:.2f}ms avg, {worst:.2f}ms max ({count} runs)"
+            for stage, (count, avg, worst) in automod.timings.summary().items()
+        ]
+        if timings:
+            embed.add_field(
+                name="Stage Latency",
+                value="```yaml\n" + "\n".join(timings) + "\n```",
+                inline=False,
+            )
+
         await interaction.response.send_message(embed=embed)
 
     async def _handler(self, message: discord.Message) -> None:
         """The main automod handler"""
-        automod = self.bot.AutomodHandler(self.bot, message)
-        member = message.guild.get_member(message.author.id)
-
-        if (
-            not message.guild
-            or message.author.id == self.bot.user.id
-            or automod.is_author_mod()
-            or automod.is_ignored_channel()
-        ):
+        violation = await self.bot.automod.evaluate(message)
+        if violation is None:
             return
 
-        if await automod.is_spam():
+        member = message.author
+        rules = await self.bot.automod.rules_for(message.guild.id)
+        notices = self.bot.automod.notices
+
+        if violation.rule == "spam":
             last_warned = self.last_warned.get(member.id)
 
-            if last_warned:
-                if (time.time() - last_warned) > 10:
-                    self.last_warned[member.id] = time.time()
-                    await message.channel.send(
-                        f"{member.mention}, stop spamming idiot.", delete_after=2
-                    )
-                await automod.take_action()
-            else:
+            if not last_warned or (time.time() - last_warned) > 10:
                 self.last_warned[member.id] = time.time()
-                await message.channel.send(
-                    f"{member.mention}, stop spamming idiot.", delete_after=2
-                )
-                await automod.take_action()
-
-        elif await automod.is_badwords():
-            await message.channel.send(
-                f"{member.mention}, that word is blacklisted.",
-                delete_after=self.delete_after,
+                notices.warn(message.channel, member, "stop spamming idiot.", 2)
+
+        elif violation.rule == "badwords":
+            notices.warn(
+                message.channel,
+                member,
+                f"that word (||{violation.data}||) is blacklisted.",
+                rules.delete_after,
             )
-            await automod.take_action()
 
-        elif await automod.is_caps():
-            await message.channel.send(
-                f"{member.mention}, you exceeded the capitals limit : `{self.caps_limit}`% of your message length",
-                delete_after=self.delete_after,
+        elif violation.rule == "caps":
+            notices.warn(
+                message.channel,
+                member,
+                f"you exceeded the capitals limit : `{rules.caps_threshold}`% of your message length",
+                rules.delete_after,
             )
-            await automod.take_action()
 
-        elif await automod.is_invite():
-            await message.channel.send(
-                f"{member.mention}, do not send invite links.",
-                delete_after=self.delete_after,
+        elif violation.rule == "invites":
+            notices.warn(
+                message.channel,
+                member,
+                "do not send invite links.",
+                rules.delete_after,
             )
-            await automod.take_action()
 
-        elif _phish_res := (await automod.is_phish_url()):
+        elif violation.rule == "phish":
             desc = "\n".join(
                 [
                     f"Domain: {match['url'][:12]}..., Type: {match['type']}, Surety: {float(match['trust_rating']) * 100}%"
-                    for match in _phish_res[1]
+                    for match in violation.data
                 ]
             )
-            await message.channel.send(
+            notices.warn(
+                message.channel,
+                member,
                 (
-                    f"{member.mention}, you really think you can phish people?\n\n"
+                    "you really think you can phish people?\n\n"
                     "Anti Phish Test Results:\n"
                     f"```{desc}```"
                 ),
-                delete_after=7,
+                7,
             )
-            await automod.take_action()
 
-        elif await automod.is_nsfw():
-            await message.channel.send(
-                f"{member.mention}, bruv you are not allowed to send NSFW content here.",
-                delete_after=self.delete_after,
+        elif violation.rule == "nsfw":
+            notices.warn(
+                message.channel,
+                member,
+                "bruv you are not allowed to send NSFW content here.",
+                rules.delete_after,
             )
-            await automod.take_action()
 
-        elif await automod.excess_mentions():
-            await message.channel.send(
-                f"{member.mention}, too many mentions in a message. Maximum allowed: {self.mention_limit}",
-                delete_after=self.delete_after,
+        elif violation.rule == "mentions":
+            notices.warn(
+                message.channel,
+                member,
+                f"too many mentions in a message. Maximum allowed: {rules.mention_limit}",
+                rules.delete_after,
             )
-            await automod.take_action()
+
+        await self.bot.automod.take_action(message)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -205,5 +213,5 @@ async def setup(bot):
     """Setup function for cog"""
     await bot.add_cog(
         Automoderation(bot),
-        guild=discord.Object(id=bot.config["bot_config"]["guild_id"]),
+        guilds=bot.command_guilds,
     )
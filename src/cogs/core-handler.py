@@ -31,7 +31,6 @@ Kindly check out ../LICENSE
 """
 
 import contextlib
-import traceback
 
 import discord
 from discord import app_commands
@@ -45,6 +44,34 @@ class CoreHandlers(commands.Cog):
         self.bot = bot
         self.category = [None]
 
+    @commands.Cog.listener()
+    async def on_app_command_completion(
+        self, interaction: discord.Interaction, command: app_commands.Command
+    ):
+        latency = discord.utils.utcnow() - interaction.created_at
+        self.bot.logger.info(
+            f"/{command.qualified_name} by {interaction.user.id}",
+            extra={
+                "guild": interaction.guild_id,
+                "cog": command.binding.qualified_name if command.binding else None,
+                "command": command.qualified_name,
+                "latency_ms": round(latency.total_seconds() * 1000, 1),
+            },
+        )
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        latency = discord.utils.utcnow() - ctx.message.created_at
+        self.bot.logger.info(
+            f"{ctx.prefix}{ctx.command.qualified_name} by {ctx.author.id}",
+            extra={
+                "guild": ctx.guild.id if ctx.guild else None,
+                "cog": ctx.cog.qualified_name if ctx.cog else None,
+                "command": ctx.command.qualified_name,
+                "latency_ms": round(latency.total_seconds() * 1000, 1),
+            },
+        )
+
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
         error = getattr(error, "original", error)
@@ -61,8 +88,6 @@ class CoreHandlers(commands.Cog):
             with contextlib.suppress(discord.NotFound, discord.Forbidden):
                 await ctx.send(embed=embed)
 
-            traceback_embeds = self.bot.tools.error_to_embed(self.bot, error)
-
             # Add message content
             info_embed = discord.Embed(
                 title="Message content",
@@ -108,7 +133,7 @@ class CoreHandlers(commands.Cog):
 
             info_embed.add_field(name="User", value=value)
 
-            await self.bot.console.send(embeds=[*traceback_embeds, info_embed])
+            await self.bot.errors.report(error, info_embed)
 
 
 async def setup(bot):
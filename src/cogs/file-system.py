@@ -30,13 +30,18 @@ Conditions:
 Kindly check out ../LICENSE
 """
 
-from os import listdir, remove
-from os.path import exists
+import io
 
 import discord
 from discord import app_commands, ui
 from discord.ext import commands
 
+from utils.file_store import NotOwner, QuotaExceeded
+
+
+def _as_file(name: str, data: bytes) -> discord.File:
+    return discord.File(io.BytesIO(data), filename=name)
+
 
 class FileInput(ui.Modal):
     """The parent file input modal"""
@@ -50,6 +55,11 @@ class FileInput(ui.Modal):
         placeholder="Type your file content here...",
     )
 
+    def __init__(self, store, *, override: bool = False):
+        super().__init__()
+        self.store = store  # the bot's utils.file_store.FileStore
+        self.override = override  # a bot owner, may change anyone's files
+
     async def on_error(
         self, error: Exception, interaction: discord.Interaction
     ) -> None:
@@ -58,16 +68,33 @@ class FileInput(ui.Modal):
         )
         raise error
 
+    async def _refused(self, interaction: discord.Interaction, error) -> None:
+        if isinstance(error, QuotaExceeded):
+            text = (
+                f"You are out of file space: {error.used / 1000:.1f} "
+                f"of {error.quota / 1000:.0f} KB used."
+            )
+        elif error.owner:
+            text = f"`{self.name.value}` belongs to <@{error.owner}>, only they can change it."
+        else:
+            text = f"`{self.name.value}` can only be changed by the bot's owners."
+
+        await interaction.response.send_message(text, ephemeral=True)
+
 
 class Create(FileInput, title="Create file..."):
     """Create file modal"""
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        with open("./assets/files/{}".format(self.name.value), "w") as f:
-            f.write(self.text.value)
-        file = discord.File(
-            "./assets/files/{}".format(self.name.value), filename=self.name.value
-        )
+        data = self.text.value.encode()
+        try:
+            await self.store.write(
+                self.name.value, interaction.user.id, data, override=self.override
+            )
+        except (QuotaExceeded, NotOwner) as e:
+            return await self._refused(interaction, e)
+
+        file = _as_file(self.name.value, data)
         await interaction.response.send_message("Here you go!", file=file)
 
 
@@ -75,14 +102,18 @@ class Edit(FileInput, title="Edit file..."):
     """Edit file modal"""
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if not exists("./assets/files/{}".format(self.name.value)):
+        if await self.store.info(self.name.value) is None:
             return await interaction.response.send_message("This file does not exist!")
 
-        with open("./assets/files/{}".format(self.name.value), "w") as f:
-            f.write(self.text.value)
-        file = discord.File(
-            "./assets/files/{}".format(self.name.value), filename=self.name.value
-        )
+        data = self.text.value.encode()
+        try:
+            await self.store.write(
+                self.name.value, interaction.user.id, data, override=self.override
+            )
+        except (QuotaExceeded, NotOwner) as e:
+            return await self._refused(interaction, e)
+
+        file = _as_file(self.name.value, data)
         await interaction.response.send_message("Edited the file for you!", file=file)
 
 
@@ -90,15 +121,23 @@ class Append(FileInput, title="Append to file..."):
     """Append to file modal"""
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if not exists("./assets/files/{}".format(self.name.value)):
+        try:
+            info = await self.store.append(
+                self.name.value,
+                interaction.user.id,
+                self.text.value.encode(),
+                override=self.override,
+            )
+        except (QuotaExceeded, NotOwner) as e:
+            return await self._refused(interaction, e)
+        if info is None:
             return await interaction.response.send_message("This file does not exist!")
 
-        with open("./assets/files/{}".format(self.name.value), "a") as f:
-            f.write(self.text.value)
-        file = discord.File(
-            "./assets/files/{}".format(self.name.value), filename=self.name.value
+        # the file is not read back, /file view sends all of it
+        await interaction.response.send_message(
+            f"Appended to `{info.name}` for you! It is now {info.size / 1000:.1f} KB "
+            f"(hash `{info.hash[:12]}`)."
         )
-        await interaction.response.send_message("Append to file for you!", file=file)
 
 
 delattr(FileInput, "text")
@@ -108,10 +147,15 @@ class Delete(FileInput, title="Delete a file..."):
     """Delete file modal"""
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if not exists("./assets/files/{}".format(self.name.value)):
+        try:
+            deleted = await self.store.delete(
+                self.name.value, interaction.user.id, override=self.override
+            )
+        except NotOwner as e:
+            return await self._refused(interaction, e)
+        if not deleted:
             return await interaction.response.send_message("This file does not exist!")
 
-        remove("./assets/files/{}".format(self.name.value))
         await interaction.response.send_message(
             f"Deleted `{self.name.value}` successfully!"
         )
@@ -121,12 +165,11 @@ class View(FileInput, title="View a file..."):
     """View file modal"""
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if not exists("./assets/files/{}".format(self.name.value)):
+        data = await self.store.read(self.name.value)
+        if data is None:
             return await interaction.response.send_message("This file does not exist!")
 
-        file = discord.File(
-            "./assets/files/{}".format(self.name.value), filename=self.name.value
-        )
+        file = _as_file(self.name.value, data)
         await interaction.response.send_message("Here's the file!", file=file)
 
 
@@ -154,7 +197,9 @@ class FileSystem(commands.Cog):
         /file create
         ```
         """
-        await interaction.response.send_modal(Create())
+        await interaction.response.send_modal(
+            Create(self.bot.files, override=await self.bot.is_owner(interaction.user))
+        )
 
     @files.command(name="edit", description="Edit an already existing file")
     @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
@@ -171,7 +216,9 @@ class FileSystem(commands.Cog):
         /file edit
         ```
         """
-        await interaction.response.send_modal(Edit())
+        await interaction.response.send_modal(
+            Edit(self.bot.files, override=await self.bot.is_owner(interaction.user))
+        )
 
     @files.command(
         name="append", description="Append (add) to an already existing file"
@@ -190,7 +237,9 @@ class FileSystem(commands.Cog):
         /file append
         ```
         """
-        await interaction.response.send_modal(Append())
+        await interaction.response.send_modal(
+            Append(self.bot.files, override=await self.bot.is_owner(interaction.user))
+        )
 
     @files.command(name="delete", description="Delete an existing file")
     @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
@@ -207,12 +256,14 @@ class FileSystem(commands.Cog):
         /file delete
         ```
         """
-        await interaction.response.send_modal(Delete())
+        await interaction.response.send_modal(
+            Delete(self.bot.files, override=await self.bot.is_owner(interaction.user))
+        )
 
     @files.command(name="view", description="view an existing file")
     @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
     async def _view_file(self, interaction: discord.Interaction):
-        await interaction.response.send_modal(View())
+        await interaction.response.send_modal(View(self.bot.files))
 
     @files.command(
         name="view-names", description="View names of all the files that exist"
@@ -237,7 +288,7 @@ class FileSystem(commands.Cog):
                     ", ".join(x)
                     for x in (
                         lambda lst, n: [lst[i : i + n] for i in range(0, len(lst), n)]
-                    )([f"`{x}`" for x in listdir("./assets/files")], 4)
+                    )([f"`{x}`" for x in await self.bot.files.names()], 4)
                 ]
             )
         )
@@ -245,6 +296,4 @@ class FileSystem(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        FileSystem(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(FileSystem(bot), guilds=bot.command_guilds)
@@ -669,6 +669,4 @@ class Fun(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Fun(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Fun(bot), guilds=bot.command_guilds)
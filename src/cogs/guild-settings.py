@@ -0,0 +1,190 @@
+"""
+Licensed under GNU General Public License v3.0
+
+
+Permissions of this strong copyleft license are
+conditioned on making available complete source
+code of licensed works and modifications, which
+include larger works using a licensed work,
+under the same license. Copyright and license
+notices must be preserved. Contributors provide
+an express grant of patent rights.
+
+Permissions:
+    Commercial use
+    Modification
+    Distribution
+    Patent use
+    Private use
+
+Limitations:
+    Liability
+    Warranty
+
+Conditions:
+    License and copyright notice
+    State changes
+    Disclose source
+    Same license
+
+Kindly check out ../LICENSE
+"""
+
+from typing import Literal, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.guild_settings import PER_GUILD
+
+Section = Literal["bot_config", "automod_config", "welcome_config", "goodbye_config"]
+
+
+class GuildSettingsCog(commands.Cog):
+    """Per server settings"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.category = ["utilities"]
+
+    settings = app_commands.Group(
+        name="settings", description="Change the bot's settings for this server"
+    )
+
+    @settings.command(
+        name="view", description="Shows the settings changed for this server."
+    )
+    @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def _view(self, interaction: discord.Interaction):
+        """
+        **Description:**
+        Shows the settings changed for this server, everything else comes from the config file.
+
+        **Args:**
+        • None
+
+        **Syntax:**
+        ```
+        /settings view
+        ```
+        """
+        overrides = await self.bot.settings.overrides(interaction.guild.id)
+
+        embed = discord.Embed(
+            color=self.bot._gen_colors(), timestamp=interaction.created_at
+        )
+        embed.set_author(name=f"SETTINGS | {interaction.guild.name}")
+        if not overrides:
+            embed.description = "Nothing changed, this server uses the defaults."
+        for section in PER_GUILD:
+            lines = [
+                f"{key}: {value}"
+                for _section, key, value in overrides
+                if _section == section
+            ]
+            if lines:
+                embed.add_field(
+                    name=section,
+                    value="```yaml\n" + "\n".join(lines)[:1000] + "\n```",
+                    inline=False,
+                )
+
+        await interaction.response.send_message(embed=embed)
+
+    @settings.command(name="set", description="Change a setting for this server.")
+    @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(
+        section="The section of the config file the setting is in",
+        key="The name of the setting, eg. caps_threshold",
+        value="The new value, lists are comma separated",
+    )
+    async def _set(
+        self,
+        interaction: discord.Interaction,
+        section: Section,
+        key: str,
+        value: str,
+    ):
+        """
+        **Description:**
+        Change a setting for this server. The names are the ones of the config file.
+
+        **Args:**
+        • `<section>` - The section of the config file the setting is in
+        • `<key>` - The name of the setting, eg. `caps_threshold`
+        • `<value>` - The new value, lists are comma separated
+
+        **Syntax:**
+        ```
+        /settings set <section> <key> <value>
+        ```
+        """
+        try:
+            value = await self.bot.settings.set(
+                interaction.guild.id, section, key, value
+            )
+        except ValueError as e:
+            return await interaction.response.send_message(f"> {e}")
+
+        await interaction.response.send_message(
+            f"{self.bot.success_emoji} `{section}.{key}` is now `{value}`"
+        )
+
+    @settings.command(
+        name="reset", description="Go back to the default of a setting or a section."
+    )
+    @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(
+        section="The section of the config file",
+        key="The name of the setting, leave empty to reset the whole section",
+    )
+    async def _reset(
+        self,
+        interaction: discord.Interaction,
+        section: Section,
+        key: Optional[str] = None,
+    ):
+        """
+        **Description:**
+        Go back to the config file's value of a setting, or of a whole section.
+
+        **Args:**
+        • `<section>` - The section of the config file
+        • `[key]` - The name of the setting, leave empty to reset the whole section
+
+        **Syntax:**
+        ```
+        /settings reset <section> [key]
+        ```
+        """
+        deleted = await self.bot.settings.reset(interaction.guild.id, section, key)
+        if not deleted:
+            return await interaction.response.send_message(
+                "> That was not changed for this server."
+            )
+
+        await interaction.response.send_message(
+            f"{self.bot.success_emoji} Reset `{deleted}` setting(s) of `{section}`"
+        )
+
+    @_set.autocomplete("key")
+    @_reset.autocomplete("key")
+    async def _key_autocomplete(self, interaction: discord.Interaction, current: str):
+        section = interaction.namespace.section
+        if section not in PER_GUILD:
+            return []
+
+        return [
+            app_commands.Choice(name=key, value=key)
+            for key in self.bot.settings.defaults(section)
+            if current.lower() in key.lower()
+        ][:25]
+
+
+async def setup(bot):
+    """Setup function for cog"""
+    await bot.add_cog(GuildSettingsCog(bot), guilds=bot.command_guilds)
@@ -138,9 +138,7 @@ class Help(commands.Cog):
         if command:
             all_commands = {
                 cmd.qualified_name: cmd
-                for cmd in self.bot.tree.walk_commands(
-                    guild=discord.Object(id=self.bot.config["bot_config"]["guild_id"])
-                )
+                for cmd in self.bot.tree.walk_commands(guild=interaction.guild)
             }
 
             _cmd_str = command.lower().strip()
@@ -234,10 +232,7 @@ class Help(commands.Cog):
             )
 
             all_commands = [
-                cmd
-                for cmd in self.bot.tree.walk_commands(
-                    guild=discord.Object(id=self.bot.config["bot_config"]["guild_id"])
-                )
+                cmd for cmd in self.bot.tree.walk_commands(guild=interaction.guild)
             ]
 
             # -------
@@ -325,6 +320,4 @@ class Help(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Help(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Help(bot), guilds=bot.command_guilds)
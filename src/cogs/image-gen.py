@@ -390,6 +390,4 @@ class ImageGen(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        ImageGen(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(ImageGen(bot), guilds=bot.command_guilds)
@@ -46,7 +46,7 @@ class JLHandlers(commands.Cog):
         self.bot = bot
         self.category = [None]
 
-    def _format_text(self, text, member):
+    def _format_text(self, text, member, guild):
         """
         VARIABLES:
         {$mention} -> mention user
@@ -69,10 +69,14 @@ class JLHandlers(commands.Cog):
             "{$user}": str(member),
             "{$userid}": member.id,
             "{$pfp}": self.bot.tools._get_mem_avatar(member),
-            "{$servericon}": self.bot.tools._get_guild_icon(member),
+            "{$servericon}": (
+                guild.icon.with_format("png").url
+                if guild.icon
+                else self.bot.tools.GRAYSCALE_NOICON_REVERT
+            ),
             "{$botpfp}": self.bot.tools._get_mem_avatar(self.bot.user),
-            "{$servername}": member.guild.name,
-            "{$serverid}": member.guild.id,
+            "{$servername}": guild.name,
+            "{$serverid}": guild.id,
         }
 
         for var, val in variables.items():
@@ -85,28 +89,23 @@ class JLHandlers(commands.Cog):
         if not member or not member.guild or member.id == self.bot.user.id:
             return
 
-        if member.guild.id != self.bot.config["bot_config"]["guild_id"]:
+        if member.guild.id not in self.bot.guild_ids:
             return
 
+        guild = member.guild
+        config = (await self.bot.settings.get(guild.id))["welcome_config"]
+
         embed = discord.Embed(
             color=self.bot._gen_colors(),
             timestamp=member.joined_at,
         )
         embed.set_author(
-            name=self._format_text(
-                self.bot.config["welcome_config"]["embed_author_title"], member
-            ),
-            icon_url=self._format_text(
-                self.bot.config["welcome_config"]["embed_author_icon"], member
-            ),
+            name=self._format_text(config["embed_author_title"], member, guild),
+            icon_url=self._format_text(config["embed_author_icon"], member, guild),
         )
 
-        title = self._format_text(
-            self.bot.config["welcome_config"]["embed_title"], member
-        )
-        description = self._format_text(
-            self.bot.config["welcome_config"]["embed_description"], member
-        )
+        title = self._format_text(config["embed_title"], member, guild)
+        description = self._format_text(config["embed_description"], member, guild)
 
         if title != "":
             embed.title = title
@@ -114,58 +113,47 @@ class JLHandlers(commands.Cog):
             embed.description = description
 
         embed.set_footer(
-            text=self._format_text(
-                self.bot.config["welcome_config"]["embed_footer_text"], member
-            ),
-            icon_url=self._format_text(
-                self.bot.config["welcome_config"]["embed_footer_icon"], member
-            ),
+            text=self._format_text(config["embed_footer_text"], member, guild),
+            icon_url=self._format_text(config["embed_footer_icon"], member, guild),
         )
 
-        _text = self._format_text(
-            self.bot.config["welcome_config"]["embed_footer_icon"], member
-        )
-        channel = member.guild.get_channel(
-            self.bot.config["welcome_config"]["msg_channel_id"]
-        )
+        _text = self._format_text(config["embed_footer_icon"], member, guild)
+        channel = guild.get_channel(config["msg_channel_id"])
+        if channel is None:  # not set up for this server
+            return
 
         if _text == "":
             return await channel.send(embed=embed)
         else:
             return await channel.send(
-                content=self._format_text(
-                    self.bot.config["welcome_config"]["text"], member
-                ),
+                content=self._format_text(config["text"], member, guild),
                 embed=embed,
             )
 
     @commands.Cog.listener()
-    async def on_member_remove(self, member):
-        if not member or not member.guild or member.id == self.bot.user.id:
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # the raw event also fires for members that were never cached
+        member = payload.user
+        if member.id == self.bot.user.id or payload.guild_id not in self.bot.guild_ids:
             return
 
-        if member.guild.id != self.bot.config["bot_config"]["guild_id"]:
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
             return
 
+        config = (await self.bot.settings.get(guild.id))["goodbye_config"]
+
         embed = discord.Embed(
             color=self.bot._gen_colors(),
             timestamp=datetime.datetime.utcnow(),
         )
         embed.set_author(
-            name=self._format_text(
-                self.bot.config["goodbye_config"]["embed_author_title"], member
-            ),
-            icon_url=self._format_text(
-                self.bot.config["goodbye_config"]["embed_author_icon"], member
-            ),
+            name=self._format_text(config["embed_author_title"], member, guild),
+            icon_url=self._format_text(config["embed_author_icon"], member, guild),
         )
 
-        title = self._format_text(
-            self.bot.config["goodbye_config"]["embed_title"], member
-        )
-        description = self._format_text(
-            self.bot.config["goodbye_config"]["embed_description"], member
-        )
+        title = self._format_text(config["embed_title"], member, guild)
+        description = self._format_text(config["embed_description"], member, guild)
 
         if title != "":
             embed.title = title
@@ -173,28 +161,20 @@ class JLHandlers(commands.Cog):
             embed.description = description
 
         embed.set_footer(
-            text=self._format_text(
-                self.bot.config["goodbye_config"]["embed_footer_text"], member
-            ),
-            icon_url=self._format_text(
-                self.bot.config["goodbye_config"]["embed_footer_icon"], member
-            ),
+            text=self._format_text(config["embed_footer_text"], member, guild),
+            icon_url=self._format_text(config["embed_footer_icon"], member, guild),
         )
 
-        _text = self._format_text(
-            self.bot.config["goodbye_config"]["embed_footer_icon"], member
-        )
-        channel = member.guild.get_channel(
-            self.bot.config["goodbye_config"]["msg_channel_id"]
-        )
+        _text = self._format_text(config["embed_footer_icon"], member, guild)
+        channel = guild.get_channel(config["msg_channel_id"])
+        if channel is None:  # not set up for this server
+            return
 
         if _text == "":
             return await channel.send(embed=embed)
         else:
             return await channel.send(
-                content=self._format_text(
-                    self.bot.config["goodbye_config"]["text"], member
-                ),
+                content=self._format_text(config["text"], member, guild),
                 embed=embed,
             )
 
@@ -85,7 +85,7 @@ class Moderation(commands.Cog):
         if (
             (
                 interaction.user.top_role > member.top_role
-                or interaction.guild.owner == interaction.user
+                or interaction.guild.owner_id == interaction.user.id
             )
             and member != interaction.user
             and member.top_role < interaction.guild.me.top_role
@@ -120,6 +120,7 @@ class Moderation(commands.Cog):
             )
             await self.bot._action_logger._log_action(
                 {
+                    "guild_id": interaction.guild.id,
                     "user_id": member.id,
                     "data": {
                         "action": "Ban",
@@ -184,7 +185,7 @@ class Moderation(commands.Cog):
         if (
             (
                 interaction.user.top_role > member.top_role
-                or interaction.guild.owner == interaction.user
+                or interaction.guild.owner_id == interaction.user.id
             )
             and member != interaction.user
             and member.top_role < interaction.guild.me.top_role
@@ -222,6 +223,7 @@ class Moderation(commands.Cog):
             )
             await self.bot._action_logger._log_action(
                 {
+                    "guild_id": interaction.guild.id,
                     "user_id": member.id,
                     "data": {
                         "action": "Softban",
@@ -274,7 +276,7 @@ class Moderation(commands.Cog):
         if (
             (
                 interaction.user.top_role > member.top_role
-                or interaction.guild.owner == interaction.user
+                or interaction.guild.owner_id == interaction.user.id
             )
             and member != interaction.user
             and member.top_role < interaction.guild.me.top_role
@@ -307,6 +309,7 @@ class Moderation(commands.Cog):
             )
             await self.bot._action_logger._log_action(
                 {
+                    "guild_id": interaction.guild.id,
                     "user_id": member.id,
                     "data": {
                         "action": "Kick",
@@ -397,6 +400,7 @@ class Moderation(commands.Cog):
             )
             await self.bot._action_logger._log_action(
                 {
+                    "guild_id": interaction.guild.id,
                     "user_id": unbanned_user.id,
                     "data": {
                         "action": "Revoke ban",
@@ -648,6 +652,4 @@ class Moderation(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Moderation(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Moderation(bot), guilds=bot.command_guilds)
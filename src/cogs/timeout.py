@@ -31,6 +31,7 @@ Kindly check out ../LICENSE
 """
 
 import datetime
+import math
 from random import choice
 from typing import Optional
 
@@ -38,6 +39,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+TIMEOUTS_PER_PAGE = 15
+
 
 class Timeout(commands.Cog):
     """Timeout (mute) cog"""
@@ -99,7 +102,9 @@ class Timeout(commands.Cog):
                 "> Timeout cannot be greater than 28 days!"
             )
 
-        await member.timeout(delta, reason=reason)
+        until = discord.utils.utcnow() + delta
+        await member.timeout(until, reason=reason)
+        self.bot.member_index.record_timeout(member, until)
 
         await interaction.response.send_message(
             f"🔇 Timed out `{member}` \n**Reason:** {reason}\n**Duration:** {delta}"
@@ -126,6 +131,7 @@ class Timeout(commands.Cog):
         )
         await self.bot._action_logger._log_action(
             {
+                "guild_id": interaction.guild.id,
                 "user_id": member.id,
                 "data": {
                     "action": "Timeout",
@@ -180,6 +186,7 @@ class Timeout(commands.Cog):
             )
 
         await member.edit(timed_out_until=None, reason=reason)
+        self.bot.member_index.record_timeout(member, None)
 
         await interaction.response.send_message(
             f"🔊 Ended timeout of `{member}`\n**Reason:** {reason}"
@@ -205,6 +212,7 @@ class Timeout(commands.Cog):
         )
         await self.bot._action_logger._log_action(
             {
+                "guild_id": interaction.guild.id,
                 "user_id": member.id,
                 "data": {
                     "action": "Timeout remove",
@@ -218,49 +226,59 @@ class Timeout(commands.Cog):
     @timeout.command(name="view", description="View all timed out users for the server")
     @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
     @app_commands.checks.has_permissions(moderate_members=True)
-    async def _view(self, interaction: discord.Interaction):
+    @app_commands.describe(page="The page number")
+    async def _view(self, interaction: discord.Interaction, page: Optional[int] = 1):
         """
         **Description:**
-        View all timed out users for the server
+        View all timed out users for the server, the ones whose timeout ends first first
 
         **Args:**
-        • none
+        • `[page]` - The page number
 
         **Syntax:**
         ```
-        /timeout view
+        /timeout view [page]
         ```
         """
-
-        desc = []
-        for user in interaction.guild.members:
-            if user.is_timed_out():
-                desc.append(
-                    f"`{user}` : timed out until - `{user.timed_out_until.strftime('%d %b, %H:%M:%S')}`"
-                )
-
-        if not desc:
+        if page < 1:
             return await interaction.response.send_message(
+                "> The page should be 1 or more."
+            )
+
+        await interaction.response.defer()  # the first call chunks the guild
+        index = await self.bot.member_index.get(interaction.guild)
+        total = index.timed_out_count()
+        if not total:
+            return await interaction.followup.send(
                 "> There are no timed out members in the server!"
             )
 
+        pages = math.ceil(total / TIMEOUTS_PER_PAGE)
+        if page > pages:
+            return await interaction.followup.send(
+                f"> There are only {pages} page(s) of timed out members."
+            )
+
+        desc = [
+            f"`{name}` : timed out until - `{until.strftime('%d %b, %H:%M:%S')}`"
+            for _, until, name in index.timed_out_page(page, TIMEOUTS_PER_PAGE)
+        ]
+
         embed = discord.Embed(
             color=self.bot._gen_colors(), timestamp=interaction.created_at
         )
         embed.set_author(
             name="Timed out users", icon_url=self.bot.tools._get_guild_icon(interaction)
         )
-        embed.description = "\n".join(desc)
+        embed.description = f"Total: {total}\n\n" + "\n".join(desc)
         embed.set_footer(
-            text=f"Requested by {interaction.user}",
+            text=f"Page {page}/{pages} • Requested by {interaction.user}",
             icon_url=self.bot.tools._get_mem_avatar(interaction.user),
         )
 
-        await interaction.response.send_message(content="Here you go!", embed=embed)
+        await interaction.followup.send(content="Here you go!", embed=embed)
 
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Timeout(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Timeout(bot), guilds=bot.command_guilds)
@@ -1,13 +1,12 @@
-import os
-import platform
 import time
 
 import aiohttp
 import discord
-import psutil
 from discord import app_commands, ui
 from discord.ext import commands
 
+from utils.metrics import ShardStats, sparkline
+
 
 class Utilities(commands.Cog):
     """Utilities manager cog"""
@@ -16,6 +15,14 @@ class Utilities(commands.Cog):
         self.bot = bot
         self.category = ["utilities"]
 
+    def _shard_table(self, stats: list, current: int = None) -> str:
+        """One line per shard, the shard of `current` is marked with a *"""
+        return "\n".join(
+            f"Shard {x.shard_id}{'*' if x.shard_id == current else ''}: "
+            f"{x.latency * 1000:.2f}ms, {x.guilds} guilds, {x.event_rate:.1f} events/s"
+            for x in sorted(stats)
+        )
+
     @app_commands.command(
         name="server-info", description="All the information about the guild."
     )
@@ -33,6 +40,10 @@ class Utilities(commands.Cog):
         /server-info
         ```
         """
+        await interaction.response.defer()  # the first call chunks the guild
+        members = await self.bot.member_index.get(interaction.guild)
+        counters = self.bot.guild_stats.counters(interaction.guild)
+
         embed = discord.Embed(
             color=self.bot._gen_colors(),
             timestamp=interaction.created_at,
@@ -42,7 +53,7 @@ class Utilities(commands.Cog):
         embed.set_author(name=interaction.guild.name)
         embed.add_field(
             name="Owner",
-            value=f"{interaction.guild.owner} ( {interaction.guild.owner.id} )",
+            value=f"{interaction.guild.owner} ( {interaction.guild.owner_id} )",
             # inline=False,
         )
         embed.add_field(
@@ -54,8 +65,8 @@ class Utilities(commands.Cog):
             name="Members",
             value=f"""
 Total members: {interaction.guild.member_count};
-Humans: {len([m for m in interaction.guild.members if not m.bot])}
-Bots: {len([m for m in interaction.guild.members if m.bot])}
+Humans: {members.humans}
+Bots: {members.bots}
 """,
             # inline=False,
         )
@@ -81,10 +92,10 @@ Bots: {len([m for m in interaction.guild.members if m.bot])}
         embed.add_field(
             name="Channels",
             value=f"""
-Total channels: {len(interaction.guild.text_channels)+len(interaction.guild.voice_channels)+len(interaction.guild.stage_channels)}
-• Text Channels: {len(interaction.guild.text_channels)}
-• Voice channels: {len(interaction.guild.voice_channels)}
-• Stage Channels: {len(interaction.guild.stage_channels)}
+Total channels: {counters.text_channels + counters.voice_channels + counters.stage_channels}
+• Text Channels: {counters.text_channels}
+• Voice channels: {counters.voice_channels}
+• Stage Channels: {counters.stage_channels}
 """,
         )
         embed.add_field(
@@ -99,8 +110,8 @@ Boost level: {'Level '+str(interaction.guild.premium_tier) if interaction.guild.
         embed.add_field(
             name="Roles",
             value=f"""
-Total roles: {len(interaction.guild.roles)-1}
-Bot Roles: {len([r for r in interaction.guild.roles if r.is_bot_managed()])}
+Total roles: {counters.roles - 1}
+Bot Roles: {counters.bot_roles}
 """,
         )
         embed.add_field(
@@ -112,7 +123,7 @@ Bot Roles: {len([r for r in interaction.guild.roles if r.is_bot_managed()])}
             text=f"Requested by {interaction.user}",
             icon_url=self.bot.tools._get_mem_avatar(interaction.user),
         )
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
 
     @app_commands.command(
         name="user-info", description="All the information about a user."
@@ -209,7 +220,7 @@ Bot Roles: {len([r for r in interaction.guild.roles if r.is_bot_managed()])}
         if member.guild_permissions.administrator:
             ack = "Server Administrator"
             has_an_ack = True
-        if member.id == interaction.guild.owner.id:
+        if member.id == interaction.guild.owner_id:
             ack = "Server owner"
             has_an_ack = True
 
@@ -218,6 +229,36 @@ Bot Roles: {len([r for r in interaction.guild.roles if r.is_bot_managed()])}
 
         await interaction.response.send_message(embed=embed)
 
+    def _host_metrics(self) -> str:
+        """The latest host sample with the recent history as sparklines"""
+        sampler = self.bot.host_sampler
+        sample = sampler.latest
+        if sample is None:
+            return "Host metrics: not sampled yet"
+
+        lines = [
+            (
+                "Ram Usage",
+                f"{sample.memory_used / 1_000_000:.0f} / {sample.memory_total / 1_000_000:.0f}MB",
+                None,
+            ),
+            ("Process Memory", f"{sample.rss / 1_000_000:.0f}MB", "rss"),
+            ("Cpu Usage", f"{sample.cpu:.1f}%", "cpu"),
+            ("Loop Lag (peak)", f"{sample.loop_lag * 1000:.1f}ms", "loop_lag"),
+            ("Open Files", sample.open_files, "open_files"),
+            ("Tasks", sample.tasks, "tasks"),
+        ]
+        text = "\n".join(
+            f"{name}: {value}"
+            + (f" {sparkline(sampler.history(field)[-20:])}" if field else "")
+            for name, value, field in lines
+        )
+        age = time.time() - sample.at
+        if age > sampler.interval * 3:
+            text += f"\n(sampling is failing, last sample {age:.0f}s ago)"
+
+        return text
+
     @app_commands.command(name="bot-info", description="Check the stats of the bot!")
     @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
     async def _bot_info(self, interaction: discord.Interaction):
@@ -243,43 +284,43 @@ Bot Roles: {len([r for r in interaction.guild.roles if r.is_bot_managed()])}
         )
         embed.set_thumbnail(url=self.bot.tools._get_mem_avatar(self.bot.user))
 
-        os_name = "Not recognized"
-        kernel = platform.system()
-
-        if kernel == "Windows":
-            os_name = "Windows " + platform.release()
-        if kernel == "Darwin":
-            _raw_release = os.popen("/usr/bin/sw_vers").read().split("\n")
-            release = {}
-            for inf in _raw_release:
-                inf = inf.split(":")
-                try:
-                    release[inf[0]] = inf[1].strip()
-                except IndexError:
-                    pass
-
-            os_name = "MacOS " + str(release.get("ProductVersion"))
-        if kernel == "Linux":
-            os_name = (
-                os.popen("grep '^NAME' /etc/os-release").read().replace("NAME=", "")
-            )
+        host = self.bot.guild_stats.host
+
+        clusters = await self.bot.cluster_stats()
+        shards = [ShardStats(*x) for y in clusters.values() for x in y["shards"]]
 
         embed.description = f"""
 > **What is {self.bot.config['bot_config']['bot_name']}?** ```{self.bot.config['bot_config']['bot_description']}```
 > **Hyena Version:** `{self.bot.config['bot_config']['bot_version']}`
-> **Total Users:** `{len(self.bot.users)}`
+> **Total Users:** `{sum(x["users"] for x in clusters.values())}`
 > **Guild Prefix:** `{self.bot.config['bot_config']['bot_prefix']}`
 > **Owners:** `{", ".join([str(self.bot.get_user(x)) for x in self.bot.owner_ids])}`
 ```yaml
-Ram Usage: {psutil.virtual_memory().used / 1_000_000} / {psutil.virtual_memory().total / 1_000_000}
-Cpu Usage: {psutil.cpu_percent()}%
-Discord.py Version: {discord.__version__}
-Kernel: {kernel}
-Kernel Version: {platform.version()}
-OS Name: {os_name}
-Python Version: Python {platform.python_version()}
+{self._host_metrics()}
+Discord.py Version: {host["discord_version"]}
+Kernel: {host["kernel"]}
+Kernel Version: {host["kernel_version"]}
+OS Name: {host["os_name"]}
+Python Version: Python {host["python_version"]}
 ```
 """
+        current = interaction.guild.shard_id if interaction.guild else None
+        embed.add_field(
+            name="Shards",
+            value=f"```yaml\n{self._shard_table(shards, current)}\n```",
+            inline=False,
+        )
+        if self.bot.ipc is not None:
+            embed.add_field(
+                name="Clusters",
+                value="```yaml\n"
+                + "\n".join(
+                    f"Cluster {x}: {y['guilds']} guilds, {y['memory'] / 1_000_000:.0f}MB"
+                    for x, y in clusters.items()
+                )
+                + "\n```",
+                inline=False,
+            )
 
         await interaction.response.send_message(embed=embed)
 
@@ -350,9 +391,12 @@ Python Version: Python {platform.python_version()}
         await interaction.response.send_message("🏓 Ping...")
         end = time.perf_counter()
         duration = (end - start) * 1000
+        current = interaction.guild.shard_id if interaction.guild else None
         await interaction.edit_original_response(
-            content="**🏓 Pong!**\n```yaml\nMessage: {:.2f}ms\nWebsocket: {:.2f}ms```".format(
-                duration, self.bot.latency * 1000
+            content="**🏓 Pong!**\n```yaml\nMessage: {:.2f}ms\nWebsocket: {:.2f}ms\n{}```".format(
+                duration,
+                self.bot.latency * 1000,
+                self._shard_table(self.bot.shard_stats(), current),
             )
         )
 
@@ -440,6 +484,4 @@ Python Version: Python {platform.python_version()}
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Utilities(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Utilities(bot), guilds=bot.command_guilds)
@@ -30,8 +30,9 @@ Conditions:
 Kindly check out ../LICENSE
 """
 
-import json
+import math
 import random
+import sqlite3
 import string
 from typing import Optional
 
@@ -50,6 +51,15 @@ class Warnings(commands.Cog):
 
     # helper
 
+    async def _count_warnings(self, guild_id: int, user_id: int) -> int:
+        """Number of warnings a user has in a guild"""
+        (total,) = await self._db.fetchone(
+            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id),
+        )
+
+        return total
+
     def _gen_id(self):
         """Generate a random warn indetifier"""
         return "".join(
@@ -63,9 +73,10 @@ class Warnings(commands.Cog):
 
     def _format_warning(self, guild: discord.Guild, warning: dict, serial: int) -> str:
         """Format the given warning record"""
-        moderator = guild.get_member(warning["moderator"])
+        # members are not all cached, the id is shown when the name is not known
+        moderator = guild.get_member(warning["moderator"]) or "Unknown"
         _str = (
-            f"#{serial + 1}: **{warning['id']}**: - By: `{moderator}` ({moderator.id})"
+            f"#{serial + 1}: **{warning['id']}**: - By: `{moderator}` ({warning['moderator']})"
             f"\n> **Reason:** {warning['reason']}"
         )
 
@@ -110,50 +121,32 @@ class Warnings(commands.Cog):
                 "Reason cannot be more than 150 characters. Optimization issues."
             )
 
-        cursor = await self._db.execute(
-            "SELECT * FROM warns WHERE user_id = ?", (member.id,)
-        )
-        res = await cursor.fetchone()
-
-        _id = self._gen_id()
-        _ordinal = "1st"
-
-        if not res:
-            await self._db.execute(
-                "INSERT INTO warns(user_id, warn_data) VALUES(?,?)",
-                (
-                    member.id,
-                    json.dumps(
-                        [
-                            {
-                                "reason": reason,
-                                "id": _id,
-                                "moderator": interaction.user.id,
-                            }
-                        ]
-                    ),
-                ),
-            )
-        if res:
-            old = json.loads(res[1])
-            old.append({"reason": reason, "id": _id, "moderator": interaction.user.id})
-            new = json.dumps(old)
-            _ordinal = (
-                lambda n: "%d%s"
-                % (
-                    n,
-                    {1: "st", 2: "nd", 3: "rd"}.get(
-                        n % 100 if n % 100 < 20 else n % 10, "th"
+        while True:
+            _id = self._gen_id()
+            try:
+                await self._db.execute(
+                    "INSERT INTO warnings(warn_id, guild_id, user_id, reason, moderator, created_at) "
+                    "VALUES(?,?,?,?,?,?)",
+                    (
+                        _id,
+                        interaction.guild.id,
+                        member.id,
+                        reason,
+                        interaction.user.id,
+                        discord.utils.utcnow().timestamp(),
                     ),
                 )
-            )(len(old))
-
-            await self._db.execute(
-                "UPDATE warns SET warn_data = ? WHERE user_id = ?", (new, member.id)
-            )
-
-        await self._db.commit()
-        await cursor.close()
+                break
+            except sqlite3.IntegrityError:  # identifier already taken, roll again
+                continue
+
+        total = await self._count_warnings(interaction.guild.id, member.id)
+        _ordinal = "%d%s" % (
+            total,
+            {1: "st", 2: "nd", 3: "rd"}.get(
+                total % 100 if total % 100 < 20 else total % 10, "th"
+            ),
+        )
 
         try:
             await member.send(
@@ -181,6 +174,7 @@ class Warnings(commands.Cog):
         )
         await self.bot._action_logger._log_action(
             {
+                "guild_id": interaction.guild.id,
                 "user_id": member.id,
                 "data": {
                     "action": "Warn",
@@ -218,40 +212,24 @@ class Warnings(commands.Cog):
                 "You cannot do this action due to role-hierchery"
             )
 
-        cursor = await self._db.execute(
-            "SELECT * FROM warns WHERE user_id = ?", (member.id,)
-        )
-        res = await cursor.fetchone()
-
-        if not res:
+        if not await self._count_warnings(interaction.guild.id, member.id):
             return await interaction.response.send_message(
                 "Brev, there are no current warnings for this user"
             )
-        if res:
-            warnings = json.loads(res[1])
-
-            currwarn = None
-            for warn in warnings:
-                if warn.get("id") == indentifier:
-                    currwarn = warn
-                    break
-
-            if not currwarn:
-                return await interaction.response.send_message(
-                    f"{member} has no warns with the ID `{indentifier}`\n**Note:** Capitalisation matters."
-                )
-            warnings.remove(currwarn)
 
-            await self._db.execute(
-                "UPDATE warns SET warn_data = ? WHERE user_id = ?",
-                (json.dumps(warnings), member.id),
-            )
-            await interaction.response.send_message(
-                f"Successfully revoked warn `{indentifier}` from `{member}`"
+        deleted = await self._db.execute(
+            "DELETE FROM warnings WHERE warn_id = ? AND guild_id = ? AND user_id = ?",
+            (indentifier, interaction.guild.id, member.id),
+        )
+
+        if not deleted:
+            return await interaction.response.send_message(
+                f"{member} has no warns with the ID `{indentifier}`\n**Note:** Capitalisation matters."
             )
 
-        await self._db.commit()
-        await cursor.close()
+        await interaction.response.send_message(
+            f"Successfully revoked warn `{indentifier}` from `{member}`"
+        )
 
         try:
             await member.send(
@@ -274,6 +252,7 @@ class Warnings(commands.Cog):
         )
         await self.bot._action_logger._log_action(
             {
+                "guild_id": interaction.guild.id,
                 "user_id": member.id,
                 "data": {
                     "action": "Revoke warn",
@@ -312,50 +291,48 @@ class Warnings(commands.Cog):
                 "Breh, input an integer [not less than 1]."
             )
 
-        cursor = await self._db.execute(
-            "SELECT * FROM warns WHERE user_id = ?", (member.id,)
-        )
-        res = await cursor.fetchone()
-
-        if not res:
+        total = await self._count_warnings(interaction.guild.id, member.id)
+        if not total:
             return await interaction.response.send_message(
                 "Brev, there are no current warnings for this user"
             )
-        if res:
-            warnings = json.loads(res[1])
-            chunks = (lambda lst, n: [lst[i : i + n] for i in range(0, len(lst), n)])(
-                warnings, 5
+
+        pages = math.ceil(total / 5)
+        if page > pages:
+            return await interaction.response.send_message(
+                "Bruv, that page does not exist moron."
             )
 
-            try:
-                req = chunks[page - 1]
-            except IndexError:
-                return await interaction.response.send_message(
-                    "Bruv, that page does not exist moron."
-                )
+        offset = (page - 1) * 5
+        req = await self._db.fetchall(
+            "SELECT warn_id, reason, moderator FROM warnings "
+            "WHERE guild_id = ? AND user_id = ? "
+            "ORDER BY created_at, rowid LIMIT 5 OFFSET ?",
+            (interaction.guild.id, member.id, offset),
+        )
 
-            _desc_list = []
-            for warning in req:
-                _desc_list.append(
-                    self._format_warning(
-                        interaction.guild, warning, warnings.index(warning)
-                    )
+        _desc_list = []
+        for serial, (_id, reason, moderator) in enumerate(req, start=offset):
+            _desc_list.append(
+                self._format_warning(
+                    interaction.guild,
+                    {"id": _id, "reason": reason, "moderator": moderator},
+                    serial,
                 )
-            desc = "\n\n".join(_desc_list)
-
-            embed = discord.Embed(
-                color=self.bot._gen_colors(), timestamp=interaction.created_at
-            )
-            embed.set_author(
-                name=f"WARNINGS | {member}",
-                icon_url=self.bot.tools._get_mem_avatar(member),
             )
-            embed.description = f"Total: {len(warnings)}\n\n{desc}"
-            embed.set_footer(text=f"Page {page}/{len(chunks)}")
+        desc = "\n\n".join(_desc_list)
 
-            await interaction.response.send_message(embed=embed)
+        embed = discord.Embed(
+            color=self.bot._gen_colors(), timestamp=interaction.created_at
+        )
+        embed.set_author(
+            name=f"WARNINGS | {member}",
+            icon_url=self.bot.tools._get_mem_avatar(member),
+        )
+        embed.description = f"Total: {total}\n\n{desc}"
+        embed.set_footer(text=f"Page {page}/{pages}")
 
-        await cursor.close()
+        await interaction.response.send_message(embed=embed)
 
     @warning.command(
         name="remove-all", description="Remove all the warnings of a given user."
@@ -366,7 +343,7 @@ class Warnings(commands.Cog):
     )
     @app_commands.checks.has_permissions(manage_messages=True)
     @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
-    async def _warn_view(
+    async def _warn_remove_all(
         self,
         interaction,
         member: discord.Member,
@@ -389,23 +366,19 @@ class Warnings(commands.Cog):
             return await interaction.response.send_message(
                 "You cannot do this action due to role-hierchery"
             )
-        cursor = await self._db.execute(
-            "SELECT * FROM warns WHERE user_id = ?", (member.id,)
+        deleted = await self._db.execute(
+            "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?",
+            (interaction.guild.id, member.id),
         )
-        res = await cursor.fetchone()
 
-        if not res:
+        if not deleted:
             return await interaction.response.send_message(
                 "Brev, there are no current warnings for this user"
             )
-        if res:
-            await self._db.execute("DELETE FROM warns WHERE user_id = ?", (member.id,))
-            await interaction.response.send_message(
-                f"Cleared all `({len(json.loads(res[1]))})` warnings for `{member}`"
-            )
 
-        await self._db.commit()
-        await cursor.close()
+        await interaction.response.send_message(
+            f"Cleared all `({deleted})` warnings for `{member}`"
+        )
 
         try:
             await member.send(
@@ -428,6 +401,7 @@ class Warnings(commands.Cog):
         )
         await self.bot._action_logger._log_action(
             {
+                "guild_id": interaction.guild.id,
                 "user_id": member.id,
                 "data": {
                     "action": "All warnings removed",
@@ -441,6 +415,4 @@ class Warnings(commands.Cog):
 
 async def setup(bot):
     """Setup function for cog"""
-    await bot.add_cog(
-        Warnings(bot), guild=discord.Object(id=bot.config["bot_config"]["guild_id"])
-    )
+    await bot.add_cog(Warnings(bot), guilds=bot.command_guilds)
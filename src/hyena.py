@@ -30,20 +30,40 @@ Conditions:
 Kindly check out ../LICENSE
 """
 
+import asyncio
+import json
 import logging
 import os
 import random
+import sys
 import traceback
 from random import choice
 
 import aiohttp
-import aiosqlite
 import discord
+import psutil
 import yaml
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
-from utils import action_logger, automod_class, sra, tools
+from utils import (
+    action_logger,
+    automod_class,
+    cache_profile,
+    file_store,
+    guild_settings,
+    guild_stats,
+    ipc,
+    logs,
+    member_index,
+    migrations,
+    sra,
+    tools,
+)
+from utils.database import Database
+from utils.error_digest import ErrorDigest
+from utils.loop_monitor import LoopMonitor
+from utils.metrics import EventRates, HostSampler, ShardStats
 
 load_dotenv()
 
@@ -53,17 +73,29 @@ class Bot(commands.Bot):
     Base subclass of  commands.Bot, with custom methods added.
     """
 
-    def __init__(self, *args, **kwargs):
-        self.config = self._load_config()
+    def __init__(self, *args, config: dict = None, cluster: dict = None, **kwargs):
+        self.config = config or self._load_config()
+        self.cluster = cluster  # set when started by cluster.py
+        self._cogs = [
+            f"cogs.{cog[:-3]}"
+            for cog in os.listdir("cogs")
+            if cog.endswith(".py")
+            and not cog.startswith("_")
+            and not (cog in self.config["bot_config"]["cogs_not_to_load"])
+        ]
+        # only the intents and caches the loaded cogs read
+        self.cache_profile = cache_profile.build(
+            self._cogs, self.config["bot_config"].get("cache")
+        )
         super().__init__(
             command_prefix=self._bot_command_prefix,
             owner_ids=self.config["bot_config"]["owners_id"],
-            intents=discord.Intents.all(),
             allowed_mentions=discord.AllowedMentions(
                 everyone=False, roles=False, users=True, replied_user=False
             ),
             description=self.config["bot_config"]["bot_description"],
             *args,
+            **self.cache_profile.client_options(),
             **kwargs,
         )
 
@@ -74,37 +106,78 @@ class Bot(commands.Bot):
         self.get_commands = self._get_total_commands
         self.version = "1.0.0a"
         self.colors = []
-        self._cogs = [
-            f"cogs.{cog[:-3]}"
-            for cog in os.listdir("cogs")
-            if cog.endswith(".py")
-            and not cog.startswith("_")
-            and not (cog in self.config["bot_config"]["cogs_not_to_load"])
-        ]
         self.success_emoji = self.config["bot_config"]["success_emoji"]
         self.failure_emoji = self.config["bot_config"]["failure_emoji"]
         self.logger = self._configure_logging()
+        self.logger.info(f"Cache profile: {self.cache_profile.describe()}")
         self._gen_colors = lambda: choice(
             [int(x, 16) for x in self.config["bot_config"]["colors"]]
         )
 
+        self.guild_ids = self._configured_guilds()
+        self.command_guilds = [discord.Object(id=x) for x in self.guild_ids]
+
         self.tools = tools
+        self.event_rates = EventRates()
+        self.loop_monitor = LoopMonitor(
+            threshold=self.config["bot_config"].get("slow_callback_ms", 100) / 1000,
+            logger=self.logger,
+        )
+        self.host_sampler = HostSampler(
+            lag=self.loop_monitor.take_peak_lag, logger=self.logger
+        )
         self._action_logs_db = None
+        self._warns_db = None
+        self._automod_db = None
+        self._settings_db = None
+        self._files_db = None
+        self.settings = None
         self._action_logger = None
-        self.AutomodHandler = None
+        self.automod = None
+        self.member_index = None
+        self.guild_stats = None
+        self.files = None
         self.SRA = sra.SRA
+        self.errors = ErrorDigest(self)
+
+        self.ipc = None
+        if self.cluster is not None:
+            self.ipc = ipc.IPCClient(
+                self.cluster["id"],
+                (self.cluster["ipc_host"], self.cluster["ipc_port"]),
+                self.cluster["ipc_token"],
+                logger=self.logger,
+            )
+            self.ipc.register("stats", self._ipc_stats)
+            self.ipc.register("extension", self._ipc_extension)
 
     def _bot_command_prefix(self, bot, _):
         base = [f"<@!{bot.user.id}> ", f"<@{bot.user.id}> "]
         return [self.config["bot_config"]["bot_prefix"], *base]
 
     async def setup_hook(self):
+        if self.ipc is not None:
+            await self.ipc.connect()
         await self._connect_databases()
+        self.host_sampler.start()
+        self.loop_monitor.start()
+        self.settings = guild_settings.GuildSettings(self, self._settings_db)
+        self.member_index = member_index.MemberIndex(self)
+        self.guild_stats = guild_stats.GuildStats(self)
+        files_config = self.config["bot_config"].get("files") or {}
+        self.files = file_store.FileStore(
+            self._files_db,
+            quota=files_config.get("quota_bytes", file_store.QUOTA),
+            compress=files_config.get("compress", True),
+        )
         self.session = aiohttp.ClientSession()
         self.console = await self.fetch_channel(
             self.config["bot_config"]["errors_channel"]
         )
-        self.AutomodHandler = automod_class.Automod
+        self.automod = automod_class.Automod(self)
+        await self.automod.setup()
+        self._action_logger = action_logger.ModLogs(self)
+        await self._action_logger.setup()
 
         try:
             for cog in self._cogs:
@@ -116,48 +189,172 @@ class Bot(commands.Bot):
                     raise e
         except Exception as e:
             raise e
-        self._action_logger = action_logger.ModLogs(self)
 
     async def _connect_databases(self):
-        self._action_logs_db = await aiosqlite.connect("./data/action-logs.sqlite")
-        self._warns_db = await aiosqlite.connect("./data/warns.sqlite")
+        self._action_logs_db = await Database("./data/action-logs.sqlite").connect()
+        self._warns_db = await Database("./data/warns.sqlite").connect()
+        self._automod_db = await Database("./data/automod-cache.sqlite").connect()
+        self._settings_db = await Database("./data/guild-settings.sqlite").connect()
+        self._files_db = await Database("./data/files.sqlite").connect()
+
+        for db, schema in (
+            (self._action_logs_db, migrations.ACTION_LOGS),
+            (self._warns_db, migrations.WARNS),
+            (self._automod_db, migrations.AUTOMOD_CACHE),
+            (self._settings_db, migrations.GUILD_SETTINGS),
+            (self._files_db, migrations.FILES),
+        ):
+            await migrations.migrate(db, schema, self.logger)
+
+    async def _close_databases(self):
+        for db in (
+            self._action_logs_db,
+            self._warns_db,
+            self._automod_db,
+            self._settings_db,
+            self._files_db,
+        ):
+            if db is not None:
+                await db.close()
 
     async def close(self):
+        self.host_sampler.stop()
+        self.loop_monitor.stop()
+        if self._action_logger is not None:
+            await self._action_logger.close()
+        if self.automod is not None:
+            await self.automod.close()
+        await self._close_databases()
+        if self.ipc is not None:
+            await self.ipc.close()
         await self.session.close()
         await super().close()
+        if self._log_listener is not None:
+            self._log_listener.stop()  # writes what is still queued
+            self._log_listener = None
 
     def run(self):
         super().run(self.secrets["TOKEN"])
 
     async def on_ready(self):
-        self.change_status.start()
+        if not self.change_status.is_running():  # on_ready fires again on reconnects
+            self.change_status.start()
+        # the member cache starts over with a new session, index the served guilds again
+        self.member_index.rebuild(filter(None, map(self.get_guild, self.guild_ids)))
         print(f"\nLogged in as {self.user} (ID: {self.user.id})")
         print("------")
 
         self.logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
 
     async def on_error(self, event_method: str, *args, **kwargs) -> None:
-        self.logger.error(traceback.format_exc())
-        embeds = self.tools.error_to_embed(self)
         context_embed = discord.Embed(
             title="Context",
             description=f"**Event**: {event_method}",
             color=discord.Color.red(),
         )
-        await self.console.send(embeds=[*embeds, context_embed])
+        await self.errors.report(sys.exc_info()[1], context_embed)
 
     async def _get_bot_prefix(self):
         return self.config["bot_config"]["bot_config"]
 
-    def _load_config(self):
+    def _configured_guilds(self):
+        """`guild_id` followed by the other servers listed in `guild_ids`"""
+        config = self.config["bot_config"]
+        guild_ids = [config["guild_id"], *(config.get("guild_ids") or [])]
+
+        return list(dict.fromkeys(x for x in guild_ids if x is not None))
+
+    @staticmethod
+    def _load_config():
         with open("../config.yml", "r") as f:
             try:
                 config = yaml.safe_load(f)
             except yaml.YAMLError as exc:
-                self.logger.critical(str(exc))
+                logging.getLogger(__name__).critical(str(exc))
+                raise
 
         return config
 
+    def dispatch(self, event_name: str, /, *args, **kwargs) -> None:
+        # count guild events per shard, to see which shard is busy
+        if args:
+            guild = getattr(args[0], "guild", None)
+            if guild is not None:
+                self.event_rates.record(guild.shard_id)
+
+        super().dispatch(event_name, *args, **kwargs)
+
+    def shard_latencies(self) -> list:
+        """[(shard id, latency in seconds)] of the shards this process runs"""
+        return [(self.shard_id or 0, self.latency)]
+
+    def shard_stats(self) -> list:
+        """ShardStats of every shard this process runs"""
+        guilds = {}
+        for guild in self.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+        return [
+            ShardStats(
+                shard_id,
+                latency,
+                guilds.get(shard_id, 0),
+                self.event_rates.rate(shard_id),
+            )
+            for shard_id, latency in self.shard_latencies()
+        ]
+
+    def process_stats(self) -> dict:
+        """The stats of this process, as sent to other clusters"""
+        sample = self.host_sampler.latest
+        return {
+            "shards": [list(x) for x in self.shard_stats()],
+            "guilds": len(self.guilds),
+            "users": self.guild_stats.members,
+            "memory": sample.rss if sample else psutil.Process().memory_info().rss,
+        }
+
+    async def cluster_stats(self) -> dict:
+        """{cluster id: stats} of every cluster, clusters that did not answer are left out"""
+        if self.ipc is None:
+            return {0: self.process_stats()}
+
+        return {
+            cluster_id: response["result"]
+            for cluster_id, response in (await self.ipc.broadcast("stats")).items()
+            if "result" in response
+        }
+
+    async def update_extension(self, cog: str, _type: str) -> list:
+        """
+        Loads, unloads or reloads a cog ("*" or "all" for every cog) without
+        replying anywhere, returns (cog, error) for the ones that failed.
+        """
+        method = {
+            "load": self.load_extension,
+            "unload": self.unload_extension,
+            "reload": self.reload_extension,
+        }[_type]
+        if cog in ["*", "all"]:
+            names = self._cogs
+        else:
+            names = ["cogs." + self.get_cog_aliases(cog.removesuffix(".py"))]
+
+        errored_out = []
+        for name in names:
+            try:
+                await method(name)
+            except commands.errors.ExtensionError as e:
+                errored_out.append((name[5:], str(e)))
+
+        return errored_out
+
+    async def _ipc_stats(self, _):
+        return self.process_stats()
+
+    async def _ipc_extension(self, data: dict):
+        return await self.update_extension(data["cog"], data["type"])
+
     def _get_total_commands(self, bot):
         total = 0
         for command in bot.commands:
@@ -181,6 +378,7 @@ class Bot(commands.Bot):
             ("images", "image", "gen", "image-gen", "img", "img-gen"): "image-gen",
             ("utils", "utilities", "util"): "utilities",
             ("automod", "am"): "automod",
+            ("settings", "guild-settings", "gs"): "guild-settings",
             ("help", "bothelp", "bot-help"): "help",
             (
                 "join-leave-handler",
@@ -209,13 +407,16 @@ class Bot(commands.Bot):
         logger = logging.getLogger(__name__)
         logger.setLevel(logging.DEBUG)
 
-        file_handler = logging.FileHandler("bot_logs.log", mode="w")
-        file_handler.setFormatter(
-            logging.Formatter(
-                "%(levelname)s:%(filename)s:%(lineno)d:%(asctime)s:%(message)s"
-            )
+        # every cluster gets its own file, they would rotate each other's
+        filename = (
+            "bot_logs.log"
+            if self.cluster is None
+            else f"bot_logs.cluster-{self.cluster['id']}.log"
+        )
+        # written by a background thread, appended to and rotated
+        self._log_listener = logs.queued_logging(
+            logger, filename, self.config["bot_config"].get("logging")
         )
-        logger.addHandler(file_handler)
 
         return logger
 
@@ -298,9 +499,81 @@ Errored out : {newline.join([f"{x[0]} : {x[1]}" for x in errored_out])}
         In decorator, seconds refer toafter how many second do you want the bot's status to update,
         minimum is 20 seconds or your bot will get rate-limited, this is optimal
         """
+        await self._set_status()
+
+    async def _set_status(self):
         await self.change_presence(
             activity=discord.Game(
                 name=random.choice(self.config["bot_config"]["statuses"])
             ),
             status=discord.Status.dnd,
         )
+
+
+class ShardedBot(Bot, commands.AutoShardedBot):
+    """
+    `Bot` on several gateway connections, enabled with `sharding.enabled`.
+    `shard_count` and `shard_ids` come from the config, when they are not
+    set discord's recommended count is used and every shard runs here.
+    """
+
+    def __init__(self, *args, config: dict = None, **kwargs):
+        config = config or self._load_config()
+        sharding = config["bot_config"].get("sharding") or {}
+        super().__init__(
+            *args,
+            config=config,
+            shard_count=sharding.get("shard_count"),
+            shard_ids=sharding.get("shard_ids"),
+            **kwargs,
+        )
+
+    def shard_latencies(self) -> list:
+        return self.latencies
+
+    async def _set_status(self):
+        """Each shard gets its own status, shards that are reconnecting are skipped"""
+        results = await asyncio.gather(
+            *[
+                self.change_presence(
+                    activity=discord.Game(
+                        name=random.choice(self.config["bot_config"]["statuses"])
+                    ),
+                    status=discord.Status.dnd,
+                    shard_id=shard_id,
+                )
+                for shard_id, shard in self.shards.items()
+                if not shard.is_closed()
+            ],
+            return_exceptions=True,
+        )
+        for error in results:
+            if isinstance(error, Exception):
+                self.logger.warning(f"Could not change a shard's status: {error!r}")
+
+    async def on_shard_ready(self, shard_id: int):
+        self.logger.info(f"Shard {shard_id} is ready")
+
+
+def create_bot() -> Bot:
+    """
+    `ShardedBot` when sharding is enabled in the config, else `Bot`.
+    Processes started by cluster.py run the shards the launcher gave them.
+    """
+    config = Bot._load_config()
+
+    cluster = os.environ.get("HYENA_CLUSTER")
+    if cluster:
+        cluster = json.loads(cluster)
+        config["bot_config"]["sharding"] = {
+            "enabled": True,
+            "shard_count": cluster["shard_count"],
+            "shard_ids": cluster["shard_ids"],
+        }
+        return ShardedBot(config=config, cluster=cluster)
+
+    sharding = config["bot_config"].get("sharding") or {}
+    if sharding.get("enabled") is True:
+        return ShardedBot(config=config)
+
+    return Bot(config=config)
@@ -1,12 +1,96 @@
+import asyncio
+import contextlib
 import json
+import traceback
 
 import discord
 
+from utils.channel_publisher import ChannelPublisher
+
+ACTION_COLUMNS = ("action", "reason", "moderator", "at")  # the rest goes to `extra`
+INSERT_ACTION = (
+    'INSERT INTO mod_actions("guild_id", "user_id", "action", "reason", "moderator", "at", "extra") '
+    "VALUES(?,?,?,?,?,?,?)"
+)
+FLUSH_INTERVAL = 2  # seconds queued actions may wait before they are committed
+FLUSH_SIZE = 200  # queued actions that trigger an early commit
+
 
 class ModLogs:
     def __init__(self, bot):
         self.bot = bot
         self._db = self.bot._action_logs_db
+        self._pending = []  # rows waiting for the next group commit
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer = None
+        self._closing = False
+        # embeds are batched per guild, up to 10 per message
+        self._publisher = ChannelPublisher(bot, self._logs_channel)
+        bot.add_listener(self.on_guild_settings_update)
+
+    async def setup(self):
+        """Start the write-behind task, the schema is handled by `utils.migrations`"""
+        self._writer = asyncio.create_task(self._write_behind())
+
+    async def close(self):
+        """Stop the writer and commit whatever is still queued"""
+        self._closing = True
+        if self._writer is not None:
+            self._wakeup.set()
+            await self._writer  # lets a flush in progress finish, never cancelled
+            self._writer = None
+        await self.flush()
+        await self._publisher.close()
+
+    async def _write_behind(self):
+        while not self._closing:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_INTERVAL)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Group commit every queued action in one transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+
+            try:
+                async with self._db.transaction() as conn:
+                    async with conn.executemany(INSERT_ACTION, rows):
+                        pass
+            except Exception:
+                self._pending[:0] = rows  # retried on the next flush
+                self.bot.logger.error(traceback.format_exc())
+            except BaseException:
+                self._pending[:0] = rows  # cancelled, the rows are not lost either
+                raise
+
+    @staticmethod
+    def _to_row(guild_id: int, user_id: int, data: dict) -> tuple:
+        extra = {x: y for x, y in data.items() if x not in ACTION_COLUMNS}
+        return (
+            guild_id,
+            user_id,
+            data["action"],
+            data.get("reason"),
+            data.get("moderator"),
+            data.get("at", 0),
+            json.dumps(extra) if extra else None,
+        )
+
+    @staticmethod
+    def _from_row(row) -> dict:
+        action, reason, moderator, at, extra = row
+        return {
+            "action": action,
+            "reason": reason,
+            "moderator": moderator,
+            "at": at,
+            **json.loads(extra or "{}"),
+        }
 
     async def _send_embed(
         self,
@@ -15,9 +99,6 @@ class ModLogs:
         description: str,
         timestamp,
     ):
-        _logs_channel = self.bot.get_channel(
-            self.bot.config["bot_config"]["mod_action_logs_channel"]
-        )
         embed = discord.Embed(
             color=self.bot._gen_colors(),
             timestamp=timestamp,
@@ -37,15 +118,23 @@ class ModLogs:
             text=f"Moderator: {moderator}",
             icon_url=self.bot.tools._get_mem_avatar(moderator),
         )
+        self._publisher.publish(moderator.guild.id, embed)
+
+    async def _logs_channel(self, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
 
-        try:
-            await _logs_channel.send(embed=embed)
-        except Exception as e:
-            pass
+        settings = await self.bot.settings.get(guild_id)
+        return guild.get_channel(settings["bot_config"]["mod_action_logs_channel"])
+
+    async def on_guild_settings_update(self, guild_id: int):
+        self._publisher.forget(guild_id)
 
     async def _log_action(self, action: dict):
         """
         {
+            "guild_id": 794467787690344508, # ID of the server the action was taken in
             "user_id": 521640052195852298, # ID of the user against which the moderation action was take
             "data": {
                 "action": "The moderation action", # eg. "warn" or "ban" etc.
@@ -55,22 +144,43 @@ class ModLogs:
                 # These three are mandoratory you could add any others
             }
         }
+
+        The action is only queued here, it is written by the next group commit.
         """
-        cursor = await self._db.execute(
-            "SELECT * FROM moderation_actions WHERE user_id = ?", (action["user_id"],)
+        self._pending.append(
+            self._to_row(action["guild_id"], action["user_id"], action["data"])
+        )
+        if len(self._pending) >= FLUSH_SIZE:
+            self._wakeup.set()
+
+    async def _count_actions(self, guild_id: int, user_id: int) -> int:
+        await self.flush()
+        (total,) = await self._db.fetchone(
+            "SELECT COUNT(*) FROM mod_actions WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id),
+        )
+
+        return total
+
+    async def _get_actions(
+        self, guild_id: int, user_id: int, *, limit: int, offset: int
+    ) -> list:
+        """One page of a user's actions in a guild, oldest first"""
+        await self.flush()
+        rows = await self._db.fetchall(
+            'SELECT "action", "reason", "moderator", "at", "extra" FROM mod_actions '
+            "WHERE guild_id = ? AND user_id = ? ORDER BY at, id LIMIT ? OFFSET ?",
+            (guild_id, user_id, limit, offset),
+        )
+
+        return [self._from_row(row) for row in rows]
+
+    async def _clear_actions(self, guild_id: int, user_id: int) -> int:
+        """Deletes the actions of a user in a guild, returns how many were deleted"""
+        await self.flush()
+        deleted = await self._db.execute(
+            "DELETE FROM mod_actions WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id),
         )
-        res = await cursor.fetchone()
-        if not res:
-            await self._db.execute(
-                "INSERT INTO moderation_actions(user_id, actions) VALUES(?,?)",
-                (action["user_id"], json.dumps([action["data"]])),
-            )
-        if res:
-            _new_data = [*json.loads(res[1]), action["data"]]
-            await self._db.execute(
-                "UPDATE moderation_actions SET actions = ? WHERE user_id = ?",
-                (json.dumps(_new_data), action["user_id"]),
-            )
 
-        await self._db.commit()
-        await cursor.close()
+        return deleted
@@ -1,19 +1,96 @@
 import asyncio
-import contextlib
 import datetime
+import hashlib
+import ipaddress
 import json
-import os
-import re
+import socket
+import time
+from typing import Any, NamedTuple, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
 import discord
-from better_profanity import profanity
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from utils.automod_notices import NoticeBoard
+from utils.caches import MISSING, PersistentCache, TTLCache
+from utils.metrics import LatencyRecorder
+from utils.scanner import ScanResult, scan, url_domain
+from utils.spam_index import SpamIndex
+from utils.wordfilter import ProfanityMatcher
 
 # Constants
-INVITE_REGEX = re.compile(
-    r"(https://www\.|https://|www\.)?(discord.gg|discord.com/invite|dis.gd/invite|dsc.io|dsc.gg|invite.gg)/[a-zA-z0-9_-]"
-)
-URL_REGEX = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
+FILTERS = ("spam", "badwords", "caps", "invites", "phish", "nsfw", "mentions")
+SAFE_DOMAINS = frozenset(
+    [
+        "discord.com",
+        "discord.gg",
+        "discordapp.com",
+        "discordapp.net",
+        "github.com",
+        "githubusercontent.com",
+        "giphy.com",
+        "google.com",
+        "imgur.com",
+        "reddit.com",
+        "spotify.com",
+        "stackoverflow.com",
+        "tenor.com",
+        "twitch.tv",
+        "twitter.com",
+        "wikipedia.org",
+        "youtu.be",
+        "youtube.com",
+    ]
+)  # never sent to the anti phishing api, subdomains included
+PHISH_CACHE_SIZE = 4096
+PHISH_CACHE_TTL = 6 * 60 * 60  # seconds
+NSFW_CACHE_SIZE = 4096  # in memory, every verdict is also kept on disk
+NSFW_CACHE_TTL = 24 * 60 * 60  # seconds
+NSFW_CONCURRENCY = 4  # images scanned at once, across all messages
+NSFW_DEADLINE = 4  # seconds to scan all the images of one message
+NSFW_MAX_IMAGE_SIZE = 8 * 1024 * 1024  # bytes, bigger images are not scanned
+NOT_AN_IMAGE = object()  # returned by Automod._image_digest, cached as None
+NETWORK_DEADLINE = 5  # seconds the remote checks of one message may take in total
+
+
+def is_safe_domain(domain: str) -> bool:
+    """Checks the domain and its parent domains against SAFE_DOMAINS"""
+    labels = domain.split(".")
+    return any(".".join(labels[i:]) in SAFE_DOMAINS for i in range(len(labels) - 1))
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.split("%")[0])
+    except ValueError:
+        return False
+    return True
+
+
+def _is_public_address(address: str) -> bool:
+    """Not localhost, a private network, the cloud metadata endpoint, ..."""
+    try:
+        return ipaddress.ip_address(address.split("%")[0]).is_global
+    except ValueError:
+        return False
+
+
+class _PublicResolver(AbstractResolver):
+    """Resolves hosts whose every address is public, the others fail to connect"""
+
+    def __init__(self):
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family=socket.AF_INET) -> list:
+        hosts = await self._resolver.resolve(host, port, family)
+        if not hosts or not all(_is_public_address(x["host"]) for x in hosts):
+            raise OSError(f"{host} resolves to a non public address")
+        return hosts
+
+    async def close(self) -> None:
+        await self._resolver.close()
 
 
 def default_filters():
@@ -21,13 +98,195 @@ def default_filters():
         return json.load(f)
 
 
+class Violation(NamedTuple):
+    """The verdict returned by `Automod.evaluate` for a rule breaking message."""
+
+    rule: str  # one of FILTERS
+    data: Any = None  # rule specific details, eg. the phishing matches
+
+
+class Rules:
+    """
+    The `automod_config` of one guild compiled for `Automod.evaluate`.
+    Built once per version of the guild's settings.
+    """
+
+    def __init__(self, config: dict, wordfilter: ProfanityMatcher):
+        self.source = config
+        self.enabled = {_filter: config.get(_filter) is True for _filter in FILTERS}
+        self.ignored_channels = frozenset(
+            x for x in (config.get("ignored_channels") or []) if x is not None
+        )
+        self.caps_threshold = int(config["caps_threshold"])
+        self.spam_threshold = config["spam_messages_back_to_back"]
+        self.duplicate_threshold = config.get("spam_duplicate_messages", 3)
+        self.mention_limit = config["mention_limit"]
+        self.allow_duplicate_mentions = config["allow_duplicate_mentions"] is True
+        self.delete_after = config.get("delete_message_after", 3)
+        self.wordfilter = wordfilter
+
+    @staticmethod
+    def custom_badwords(config: dict) -> tuple:
+        return tuple(
+            x for x in (config.get("custom_badwords") or []) if not x in [None, "", " "]
+        )
+
+
 class Automod:
-    """Automod base class with all the required methods & functionality"""
+    """
+    Long lived automod engine owned by the bot.
+
+    Each guild's `automod_config` (the wordlist, thresholds and the ignored
+    channels) is compiled into `Rules` on first use and only rebuilt when
+    the guild's settings change, so `evaluate` does no file or config
+    parsing. The caches and the spam index are shared by every guild.
+    """
 
-    def __init__(self, bot, message: discord.Message):
+    def __init__(self, bot):
         self.bot = bot
-        self.message = message
-        self.default_filters = default_filters()
+        self._rules = {}  # guild id -> Rules
+        self.default_words = default_filters()
+        self.default_wordfilter = ProfanityMatcher(self.default_words)
+        self.spam_index = SpamIndex(window=10)
+        self.timings = LatencyRecorder()
+        self.phish_cache = TTLCache(PHISH_CACHE_SIZE, PHISH_CACHE_TTL)
+        self.nsfw_cache = PersistentCache(
+            bot._automod_db,
+            "nsfw_verdicts",
+            maxsize=NSFW_CACHE_SIZE,
+            ttl=NSFW_CACHE_TTL,
+        )
+        self._nsfw_semaphore = asyncio.Semaphore(NSFW_CONCURRENCY)
+        self._images = None  # see _image_session
+        self.notices = NoticeBoard()  # the warnings and deletes, per channel
+
+    async def setup(self) -> None:
+        """Prepare the on-disk caches, called once from the bot's setup_hook"""
+        await self.nsfw_cache.setup()
+
+    async def close(self) -> None:
+        """
+        Writes the buffered cache entries and closes the image session,
+        called before the databases close
+        """
+        await self.nsfw_cache.close()
+        if self._images is not None:
+            await self._images.close()
+
+    def build(self, config: dict) -> Rules:
+        """Compile an automod config, guilds without custom words share one wordlist"""
+        custom_badwords = Rules.custom_badwords(config)
+        if custom_badwords:
+            wordfilter = ProfanityMatcher([*self.default_words, *custom_badwords])
+        else:
+            wordfilter = self.default_wordfilter
+
+        return Rules(config, wordfilter)
+
+    async def rules_for(self, guild_id: int) -> Rules:
+        """The compiled rules of a guild, rebuilt when its settings were changed"""
+        config = (await self.bot.settings.get(guild_id))["automod_config"]
+        rules = self._rules.get(guild_id)
+        if rules is None or rules.source is not config:
+            rules = self._rules[guild_id] = self.build(config)
+
+        return rules
+
+    async def evaluate(self, message: discord.Message) -> Optional[Violation]:
+        """Run every enabled rule against the message, returns the first violation"""
+        if (
+            not message.guild
+            or message.author.id == self.bot.user.id
+            or self.is_author_mod(message)
+        ):
+            return None
+
+        rules = await self.rules_for(message.guild.id)
+        if self.is_ignored_channel(message, rules):
+            return None
+
+        with self.timings.measure("spam"):
+            if await self.is_spam(message, rules):
+                return Violation("spam")
+
+        with self.timings.measure("local"):
+            tokens = scan(message.content)
+            violation = self._run_local_checks(message, tokens, rules)
+        if violation is not None:
+            return violation
+
+        with self.timings.measure("network"):
+            return await self._run_network_checks(message, tokens, rules)
+
+    def _run_local_checks(
+        self, message: discord.Message, tokens: ScanResult, rules: Rules
+    ) -> Optional[Violation]:
+        """The cheap synchronous rules, in one go"""
+        if badword := self.is_badwords(message, rules):
+            return Violation("badwords", badword)
+        if self.is_caps(tokens, rules):
+            return Violation("caps")
+        if self.is_invite(tokens, rules):
+            return Violation("invites")
+        if self.excess_mentions(message, tokens, rules):
+            return Violation("mentions")
+
+        return None
+
+    async def _run_network_checks(
+        self, message: discord.Message, tokens: ScanResult, rules: Rules
+    ) -> Optional[Violation]:
+        """
+        Runs the remote rules concurrently under one deadline, the first
+        verdict wins and the rest of the checks are cancelled.
+        """
+        if not tokens.urls and not message.attachments:
+            return None
+
+        checks = {"phish": self.is_phish_url, "nsfw": self.is_nsfw}
+        tasks = {
+            asyncio.create_task(self._timed(rule, check(message, tokens, rules))): rule
+            for rule, check in checks.items()
+            if rules.enabled[rule]
+        }
+        if not tasks:
+            return None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + NETWORK_DEADLINE
+        pending = set(tasks)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline - loop.time(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:  # deadline hit
+                    return None
+
+                for task in done:
+                    if task.exception() is not None:
+                        self.bot.logger.error(
+                            f"Automod {tasks[task]} check failed: {task.exception()!r}"
+                        )
+                        continue
+                    if result := task.result():
+                        rule = tasks[task]
+                        return Violation(rule, result[1] if rule == "phish" else None)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None
+
+    async def _timed(self, stage: str, coro):
+        """Awaits the check, cancelled checks are left out of the timings"""
+        start = time.perf_counter()
+        result = await coro
+        self.timings.record(stage, time.perf_counter() - start)
+        return result
 
     # ------------ HELPER ------------
 
@@ -44,194 +303,289 @@ class Automod:
         except (
             asyncio.exceptions.TimeoutError,
             aiohttp.client_exceptions.ClientConnectorError,
+            aiohttp.client_exceptions.ContentTypeError,
         ):
             return False
 
+    def _image_session(self) -> aiohttp.ClientSession:
+        """
+        The session images are downloaded with. It connects only to the
+        addresses its resolver checked, so a host can not answer the check
+        with a public address and the download with a private one.
+        """
+        if self._images is None or self._images.closed:
+            self._images = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(resolver=_PublicResolver())
+            )
+        return self._images
+
+    async def _image_digest(self, url: str):
+        """
+        Downloads the image and returns the sha256 of its content, so reposts
+        of an already checked image are found. NOT_AN_IMAGE for non images
+        and too big ones, None when it could not be downloaded this time
+        (redirects, errors and urls of a non public address included).
+        """
+        if "://" not in url:
+            url = "http://" + url
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return NOT_AN_IMAGE
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return NOT_AN_IMAGE
+        if _is_ip_address(parts.hostname) and not _is_public_address(parts.hostname):
+            return None  # addresses are connected to without the resolver
+
+        try:
+            # no redirects, they could lead anywhere the check above did not see
+            async with self._image_session().get(url, allow_redirects=False) as r:
+                if r.status != 200:
+                    return None
+                if not r.content_type.startswith("image/"):
+                    return NOT_AN_IMAGE
+                if (r.content_length or 0) > NSFW_MAX_IMAGE_SIZE:
+                    return NOT_AN_IMAGE
+
+                digest = hashlib.sha256()
+                size = 0
+                async for chunk in r.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > NSFW_MAX_IMAGE_SIZE:
+                        return NOT_AN_IMAGE
+                    digest.update(chunk)
+                return digest.hexdigest()
+        except (
+            asyncio.exceptions.TimeoutError,
+            aiohttp.client_exceptions.ClientError,
+            ValueError,
+        ):
+            return None
+
+    async def _api_score(self, url: str) -> Optional[float]:
+        res = await self.api_nsfw_detector(url)
+        if not res or res.get("err") is not None:
+            return None  # not cached, the next post will retry
+        try:
+            return float(res["output"]["nsfw_score"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    async def _nsfw_score(self, url: str) -> Optional[float]:
+        """The nsfw score of one image, from the cache when it was seen before"""
+        score = await self.nsfw_cache.get(f"url:{url}")
+        if score is not MISSING:
+            return score  # None when it is not an image
+
+        async with self._nsfw_semaphore:
+            digest = await self._image_digest(url)
+            if digest is None:
+                return None
+            if digest is NOT_AN_IMAGE:
+                await self.nsfw_cache.set(f"url:{url}", None)
+                return None
+
+            score = await self.nsfw_cache.get(f"sha256:{digest}")
+            if score is MISSING:
+                score = await self._api_score(url)
+                if score is None:
+                    return None
+                await self.nsfw_cache.set(f"sha256:{digest}", score)
+
+        await self.nsfw_cache.set(f"url:{url}", score)
+        return score
+
     # ------------ HANDLERS ------------
 
-    async def take_action(self) -> None:
-        """Basically, delete the message"""
-        with contextlib.suppress(discord.Forbidden, discord.NotFound):
-            await self.message.delete()
+    async def take_action(self, message: discord.Message) -> None:
+        """Basically, delete the message, with the channel's next bulk delete"""
+        self.notices.delete(message)
 
-    async def is_badwords(self) -> bool:
-        """Checks for profanity words"""
-        if not self.is_enabled("badwords"):
-            return False
-        else:
-            custom_badwords = [
-                x
-                for x in self.bot.config["automod_config"]["custom_badwords"]
-                if not x in [None, "", " "]
-            ]
-            if not custom_badwords:
-                custom_badwords = self.default_filters
-            try:
-                profanity.add_censor_words(custom_badwords)
-            except:
-                pass
-
-            badword = profanity.contains_profanity(self.message.content)
-            if badword == True:
-                return True
-            else:
-                return False
+    def is_badwords(self, message: discord.Message, rules: Rules) -> Optional[str]:
+        """Checks for profanity words, returns the blacklisted term that matched"""
+        if not rules.enabled["badwords"]:
+            return None
 
-    async def is_caps(self) -> bool:  # TODO docs
+        return rules.wordfilter.search(message.content)
+
+    def is_caps(self, tokens: ScanResult, rules: Rules) -> bool:
         """Checks for too many capitals"""
-        if not self.is_enabled("caps"):
+        if not rules.enabled["caps"]:
+            return False
+
+        # if there are less then 7 characters in our message we can ignore it.
+        if tokens.length < 7:
             return False
-        else:
-            caps_threshold = int(self.bot.config["automod_config"]["caps_threshold"])
-            count = 0
-            length = len(self.message.content)
-
-            if (
-                length < 7
-            ):  # if there are less then 7 words in our message we can ignore it.
-                return False
-
-            for word in self.message.content:
-                if word.isupper():
-                    count += 1
-
-            try:
-                percent = round(count / length * 100)
-            except:
-                return False
-
-            if percent >= caps_threshold:
-                return True
-            else:
-                return False
 
-    async def is_invite(self) -> bool:
+        return round(tokens.upper_ratio) >= rules.caps_threshold
+
+    def is_invite(self, tokens: ScanResult, rules: Rules) -> bool:
         """Checks for invite links"""
-        if not self.is_enabled("invites"):
+        if not rules.enabled["invites"]:
             return False
-        else:
-            detected = INVITE_REGEX.search(self.message.content)
 
-            if detected:
-                return True
-            else:
-                return False
+        return bool(tokens.invites)
 
-    async def is_spam(self) -> bool:
+    async def is_spam(self, message: discord.Message, rules: Rules) -> bool:
         """Anti spam system"""
-        if not self.is_enabled("spam"):
+        if not rules.enabled["spam"]:
             return False
-        else:
-            messages = list(
-                filter(
-                    lambda m: m.author == self.message.author
-                    and (
-                        datetime.datetime.now(datetime.timezone.utc) - m.created_at
-                    ).seconds
-                    < 10,
-                    self.bot.cached_messages,
-                )
-            )
 
-            current_message_interval = self.bot.config["automod_config"][
-                "spam_messages_back_to_back"
-            ]
-
-            if len(messages) >= current_message_interval:
-                await self.message.channel.purge(
-                    limit=50,
-                    check=lambda msg: msg.author.id == self.message.author.id,
-                    after=(
-                        datetime.datetime.now(datetime.timezone.utc)
-                        - datetime.timedelta(seconds=10)
-                    ),
-                    bulk=True,
-                )
-                return True
-            else:
-                return False
+        if message.edited_at is not None:  # edits were counted when first sent
+            return False
+
+        stats = self.spam_index.record(
+            message.guild.id, message.author.id, message.content
+        )
+        if (
+            stats.recent < rules.spam_threshold
+            and stats.duplicates < rules.duplicate_threshold
+        ):
+            return False
+
+        await message.channel.purge(
+            limit=50,
+            check=lambda msg: msg.author.id == message.author.id,
+            after=(
+                datetime.datetime.now(datetime.timezone.utc)
+                - datetime.timedelta(seconds=10)
+            ),
+            bulk=True,
+        )
+        self.spam_index.reset(message.guild.id, message.author.id)
+        return True
 
-    async def is_phish_url(self) -> bool:
+    async def is_phish_url(
+        self, message: discord.Message, tokens: ScanResult, rules: Rules
+    ):
         """Anti phishing systems"""
-        if not self.is_enabled("phish"):
+        if not rules.enabled["phish"]:
             return False
 
-        if re.search(URL_REGEX, self.message.content):
-            header = {
-                "Content-Type": "application/json",
-                "User-Agent": "Hyena-Hostable https://github.com/Hyena-Bot/Hyena-Hostable",
-            }
-            data = json.dumps({"message": self.message.content})
-
-            try:
-                async with self.bot.session.post(
-                    "https://anti-fish.bitflow.dev/check", headers=header, data=data
-                ) as r:
-                    results: dict = await r.json()
-                if results and results.get("match") is True:
-                    return True, results["matches"]
-                else:
-                    return False
-            except (
-                asyncio.exceptions.TimeoutError,
-                aiohttp.client_exceptions.ClientConnectorError,
-            ):
-                return False
+        domains = {url_domain(url) for url in tokens.urls}
+        domains = sorted(x for x in domains if x and not is_safe_domain(x))
+
+        matches, unknown = [], []
+        for domain in domains:
+            verdict = self.phish_cache.get(domain)
+            if verdict is MISSING:
+                unknown.append(domain)
+            else:
+                matches.extend(verdict)
+
+        if unknown:
+            results = await self._check_phish_domains(unknown)
+            for domain, verdict in (results or {}).items():
+                self.phish_cache.set(domain, verdict)
+                matches.extend(verdict)
+
+        if matches:
+            return True, matches
+        return False
+
+    async def _check_phish_domains(self, domains: list) -> Optional[dict]:
+        """
+        Checks all the given domains with one request to the anti-fish api.
+        Returns {domain: [matches]}, or None when the api could not be reached.
+        """
+        header = {
+            "Content-Type": "application/json",
+            "User-Agent": "Hyena-Hostable https://github.com/Hyena-Bot/Hyena-Hostable",
+        }
+        data = json.dumps({"message": "\n".join(domains)})
 
-    async def is_nsfw(self) -> bool:
+        try:
+            async with self.bot.session.post(
+                "https://anti-fish.bitflow.dev/check", headers=header, data=data
+            ) as r:
+                results: dict = await r.json()
+        except (
+            asyncio.exceptions.TimeoutError,
+            aiohttp.client_exceptions.ClientConnectorError,
+            aiohttp.client_exceptions.ContentTypeError,
+        ):
+            return None
+
+        verdicts = {domain: [] for domain in domains}
+        if results and results.get("match") is True:
+            for match in results["matches"]:
+                matched = url_domain(match.get("domain") or match.get("url", ""))
+                for domain in domains:
+                    if matched and (
+                        domain == matched or domain.endswith("." + matched)
+                    ):
+                        verdicts[domain].append(match)
+
+        return verdicts
+
+    async def is_nsfw(
+        self, message: discord.Message, tokens: ScanResult, rules: Rules
+    ) -> bool:
         """Checks for nsfw attachments in message"""
-        if not self.is_enabled("nsfw") or self.message.channel.is_nsfw():
+        if not rules.enabled["nsfw"] or message.channel.is_nsfw():
+            return False
+
+        attachments = [
+            x.url
+            for x in message.attachments
+            if (x.content_type or "image/").startswith("image/")
+        ]
+        image_urls = sorted(set([*tokens.urls, *attachments]))
+        if not image_urls:
             return False
 
-        regex_result = re.findall(URL_REGEX, self.message.content)
-        urls = [x[0] for x in regex_result]
-        attachments = [x.url for x in self.message.attachments]
-        image_urls = sorted(set([*urls, *attachments]))
-
-        for url in image_urls:
-            res = await self.api_nsfw_detector(url)
-            if res.get("err") is not None:
-                continue
-            try:
-                score = res["output"]["nsfw_score"]
-                if score >= 0.8:
-                    return True
-            except KeyError:
-                pass
-
-    async def excess_mentions(self):
+        pending = {asyncio.create_task(self._nsfw_score(url)) for url in image_urls}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + NSFW_DEADLINE
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline - loop.time(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:  # deadline hit
+                    return False
+
+                for task in done:
+                    if task.exception() is None and (task.result() or 0) >= 0.8:
+                        return True
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return False
+
+    def excess_mentions(
+        self, message: discord.Message, tokens: ScanResult, rules: Rules
+    ) -> bool:
         """Checks for too many mentions in the message"""
-        if not self.is_enabled("mentions"):
+        if not rules.enabled["mentions"]:
             return False
 
-        dup = self.bot.config["automod_config"]["allow_duplicate_mentions"]
-        mentions = []
-        for i in self.message.raw_mentions:
-            if i != self.message.author.id:
-                mentions.append(i)
+        mentions = [i for i in tokens.mentions if i != message.author.id]
 
-        if dup == True:
+        if rules.allow_duplicate_mentions == True:
             mentions = sorted(set(mentions))
 
-        limit = self.bot.config["automod_config"]["mention_limit"]
-        if len(mentions) > limit:
-            return True
+        return len(mentions) > rules.mention_limit
 
-    def dm_embed(self, reason: str = None) -> discord.Embed:
+    def dm_embed(self, message: discord.Message, reason: str = None) -> discord.Embed:
         """Returns a base embed for dm'ing the user."""
         embed = discord.Embed(
-            title=f"You have been warned in {self.message.guild.name}",
+            title=f"You have been warned in {message.guild.name}",
             color=discord.Color.yellow(),
         )
         if reason:
             embed.description = reason
-        embed.timestamp = self.message.created_at
+        embed.timestamp = message.created_at
 
         return embed
 
-    def is_author_mod(self) -> bool:
+    def is_author_mod(self, message: discord.Message) -> bool:
         """Returns True when the user has moderation permissions."""
-        member = self.message.author
+        member = message.author
         if isinstance(member, discord.User):
             return False
         if member.guild_permissions.administrator:
@@ -245,30 +599,13 @@ class Automod:
         else:
             return False
 
-    def is_ignored_channel(self) -> bool:
+    def is_ignored_channel(self, message: discord.Message, rules: Rules) -> bool:
         """Returns true or false considering if the channel of the message is ignored in the config"""
-        ignored_channels = self.bot.config["automod_config"]["ignored_channels"]
-        if ignored_channels:
-            return self.message.channel.id in ignored_channels
-
-    def is_enabled(self, _filter: str):
-        """ "Returns true or false considering if the given handler is enabled in the config"""
-        if _filter.lower() not in [
-            "badwords",
-            "spam",
-            "invites",
-            "phish",
-            "nsfw",
-            "mentions",
-            "caps",
-        ]:
+        return message.channel.id in rules.ignored_channels
+
+    def is_enabled(self, _filter: str, rules: Rules):
+        """Returns true or false considering if the given handler is enabled in the config"""
+        if _filter.lower() not in FILTERS:
             return (None, "Invalid option supplied.")
-        try:
-            selected_filter = self.bot.config["automod_config"][_filter]
-        except KeyError:
-            return False
 
-        if selected_filter and selected_filter is True:
-            return True
-        else:
-            return False
+        return rules.enabled[_filter.lower()]
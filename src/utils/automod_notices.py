@@ -0,0 +1,139 @@
+"""
+What the automod says and deletes, in as few requests as possible.
+
+During a spam wave every bad message used to cost a notice, a delete and
+a `delete_after` timer for the notice. `NoticeBoard` collects them per
+channel for a short window instead: the offending messages go in one
+`delete_messages` call per 100, the notices are merged into one message
+(`@a, @b, do not send invite links.`) and every notice is deleted by the
+one `DeleteTimer`.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+
+import discord
+
+NOTICE_WINDOW = 0.5  # seconds notices and deletes of a channel are collected
+BULK_DELETE = 100  # most messages of one delete_messages call
+MESSAGE_LIMIT = 2000
+
+
+async def _delete_in_bulk(channel, messages: list) -> None:
+    for start in range(0, len(messages), BULK_DELETE):
+        with contextlib.suppress(discord.HTTPException):
+            await channel.delete_messages(messages[start : start + BULK_DELETE])
+
+
+class DeleteTimer:
+    """Deletes messages when they are due, with one heap and one task for all"""
+
+    def __init__(self):
+        self._due = []  # heap of (loop time, sequence, message)
+        self._sequence = itertools.count()  # messages do not compare
+        self._changed = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, message: discord.Message, delay: float) -> None:
+        deadline = asyncio.get_running_loop().time() + delay
+        if not self._due or deadline < self._due[0][0]:
+            self._changed.set()  # sooner than what the task sleeps for
+        heapq.heappush(self._due, (deadline, next(self._sequence), message))
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._due:
+            delay = self._due[0][0] - loop.time()
+            if delay > 0:
+                self._changed.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                continue
+
+            channels = {}  # channel id -> (channel, [due messages])
+            while self._due and self._due[0][0] <= loop.time():
+                message = heapq.heappop(self._due)[2]
+                channels.setdefault(message.channel.id, (message.channel, []))[
+                    1
+                ].append(message)
+
+            for channel, messages in channels.values():
+                await _delete_in_bulk(channel, messages)
+
+
+class _Pending:
+    __slots__ = ("channel", "notices", "delete_after", "messages")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.notices = {}  # notice text -> {mention: None}, in order
+        self.delete_after = 0
+        self.messages = []  # to delete
+
+
+class NoticeBoard:
+    def __init__(self, *, window: float = NOTICE_WINDOW):
+        self.window = window
+        self.timer = DeleteTimer()
+        self._pending = {}  # channel id -> _Pending
+        self._workers = {}  # channel id -> task
+
+    def _for(self, channel) -> _Pending:
+        pending = self._pending.get(channel.id)
+        if pending is None:
+            pending = self._pending[channel.id] = _Pending(channel)
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.create_task(self._flush(channel.id))
+
+        return pending
+
+    def warn(self, channel, member, text: str, delete_after: float) -> None:
+        """Tell `member` `text` in the channel's next notice"""
+        pending = self._for(channel)
+        pending.notices.setdefault(text, {})[member.mention] = None
+        pending.delete_after = max(pending.delete_after, delete_after)
+
+    def delete(self, message: discord.Message) -> None:
+        """Delete the message with the channel's next bulk delete"""
+        self._for(message.channel).messages.append(message)
+
+    async def _flush(self, channel_id: int) -> None:
+        try:
+            await asyncio.sleep(self.window)
+            pending = self._pending.pop(channel_id)
+        finally:
+            del self._workers[channel_id]
+
+        await _delete_in_bulk(pending.channel, pending.messages)
+
+        lines = [
+            f"{', '.join(mentions)}, {text}"
+            for text, mentions in pending.notices.items()
+        ]
+        for content in self._messages(lines):
+            with contextlib.suppress(discord.HTTPException):
+                notice = await pending.channel.send(content)
+                self.timer.schedule(notice, pending.delete_after)
+
+    @staticmethod
+    def _messages(lines: list) -> list:
+        """The lines packed in as few messages as fit"""
+        messages, current = [], ""
+        for line in lines:
+            line = line[:MESSAGE_LIMIT]
+            if current and len(current) + 1 + len(line) > MESSAGE_LIMIT:
+                messages.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            messages.append(current)
+
+        return messages
@@ -0,0 +1,115 @@
+"""
+What the bot keeps from the gateway, worked out from the cogs it loads.
+
+`discord.Intents.all()` with chunking at startup makes the library hold
+every member (and their presence) of every guild, most of which no cog
+ever reads. `build` only turns on what the loaded cogs need, member lists
+are fetched per guild the first time a command needs them (see
+`utils.member_index`).
+"""
+
+from typing import Iterable, NamedTuple, Optional
+
+import discord
+
+MESSAGE_CONTENT = "message_content"  # reads what members write
+MESSAGES = "messages"  # needs earlier messages cached, eg. for on_message_edit
+MEMBERS = "members"  # member join/leave/update events and member lists
+PRESENCES = "presences"
+
+# what each cog reads, a cog that is not listed gets everything
+COG_NEEDS = {
+    "cogs.action-logs": set(),
+    "cogs.afk": {MESSAGE_CONTENT},
+    "cogs.automod": {MESSAGE_CONTENT, MESSAGES},
+    "cogs.core-handler": set(),
+    "cogs.file-system": set(),
+    "cogs.fun": {MESSAGE_CONTENT},  # waits for replies to its games
+    "cogs.guild-settings": set(),
+    "cogs.help": set(),
+    "cogs.image-gen": set(),
+    "cogs.join-leave-handler": {MEMBERS},
+    "cogs.moderation": set(),
+    "cogs.timeout": {MEMBERS},
+    "cogs.utilities": {MEMBERS},
+    "cogs.warns": set(),
+}
+BASE_NEEDS = {MESSAGE_CONTENT}  # the owner's prefix commands in __main__.py
+ALL_NEEDS = {MESSAGE_CONTENT, MESSAGES, MEMBERS, PRESENCES}
+
+DEFAULT_MAX_MESSAGES = 1000
+
+
+class CacheProfile(NamedTuple):
+    needs: frozenset
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    max_messages: Optional[int]
+    chunk_guilds_at_startup: bool
+
+    def client_options(self) -> dict:
+        """Keyword arguments for the discord.Client constructor"""
+        return {
+            "intents": self.intents,
+            "member_cache_flags": self.member_cache_flags,
+            "max_messages": self.max_messages,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+        }
+
+    def describe(self) -> str:
+        return (
+            f"needs: {', '.join(sorted(self.needs)) or 'nothing'}; "
+            f"max_messages: {self.max_messages}; "
+            f"chunk at startup: {self.chunk_guilds_at_startup}"
+        )
+
+
+def needs_of(cogs: Iterable[str]) -> set:
+    needs = set(BASE_NEEDS)
+    for cog in cogs:
+        needs |= COG_NEEDS.get(cog, ALL_NEEDS)
+
+    return needs
+
+
+def build(cogs: Iterable[str], config: Optional[dict] = None) -> CacheProfile:
+    """
+    The profile for the given cog modules. `config` is the `cache` section
+    of bot_config, `profile: full` goes back to caching everything.
+    """
+    config = config or {}
+    if config.get("profile") == "full":
+        return CacheProfile(
+            frozenset(ALL_NEEDS),
+            discord.Intents.all(),
+            discord.MemberCacheFlags.all(),
+            config.get("max_messages", DEFAULT_MAX_MESSAGES),
+            True,
+        )
+
+    needs = needs_of(cogs)
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.emojis_and_stickers = True  # keeps the emoji counts of /server-info
+    intents.message_content = MESSAGE_CONTENT in needs
+    intents.members = MEMBERS in needs
+    intents.presences = PRESENCES in needs
+
+    # members are cached when they join or once their guild is chunked,
+    # voice states and presences are never read
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.joined = intents.members
+
+    max_messages = None
+    if MESSAGES in needs:
+        max_messages = config.get("max_messages", DEFAULT_MAX_MESSAGES)
+
+    return CacheProfile(
+        frozenset(needs),
+        intents,
+        member_cache_flags,
+        max_messages,
+        bool(config.get("chunk_guilds_at_startup", False)),
+    )
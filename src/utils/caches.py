@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+MISSING = object()  # returned by TTLCache.get on a miss, so None/False can be cached
+FLUSH_DELAY = 5  # seconds the writes of a PersistentCache are buffered for
+FLUSH_BATCH = 100  # buffered writes that are written right away
+PRUNE_EVERY = 60 * 60  # seconds between two deletes of the expired rows
+
+
+class TTLCache:
+    """
+    Bounded least-recently-used mapping whose entries also expire after `ttl`
+    seconds. Keeps hit/miss counters so the size can be tuned.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires at, value)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if entry is not None:
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0
+        return (
+            f"{len(self)}/{self.maxsize} entries, "
+            f"{self.hits} hits, {self.misses} misses ({ratio:.1f}% hit rate)"
+        )
+
+
+class PersistentCache:
+    """
+    `TTLCache` in front of a key/value sqlite table, so entries survive
+    restarts. Values are stored as JSON, with the time they were stored at
+    so they expire on disk after `ttl` seconds too.
+
+    Writes are buffered and written together in one transaction
+    `flush_delay` seconds after the first of them, call `close` to write
+    what is still buffered.
+    """
+
+    def __init__(
+        self,
+        db,
+        table: str,
+        *,
+        maxsize: int,
+        ttl: float,
+        flush_delay: float = FLUSH_DELAY,
+    ):
+        self._db = db
+        self.table = table
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self.memory = TTLCache(maxsize, ttl)
+        self._pending = {}  # key -> (JSON value, stored at), not written yet
+        self._flush_task = None
+        self._pruned_at = 0.0
+
+    async def setup(self) -> None:
+        """
+        Deletes what expired while the bot was off. The table, `("key" TEXT
+        PRIMARY KEY, "value" TEXT, "stored_at" REAL)`, is created by the
+        database's migrations
+        """
+        await self.prune()
+
+    async def prune(self) -> int:
+        """Deletes the expired rows, returns how many there were"""
+        self._pruned_at = time.time()
+        return await self._db.execute(
+            f'DELETE FROM "{self.table}" WHERE "stored_at" < ?',
+            (self._pruned_at - self.ttl,),
+        )
+
+    async def get(self, key: str, default=MISSING):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return json.loads(pending[0])
+
+        res = await self._db.fetchone(
+            f'SELECT "value", "stored_at" FROM "{self.table}" WHERE "key" = ?', (key,)
+        )
+        if not res or (res[1] or 0) < time.time() - self.ttl:
+            return default
+
+        value = json.loads(res[0])
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value) -> None:
+        self.memory.set(key, value)
+        self._pending[key] = (json.dumps(value), time.time())
+
+        if len(self._pending) >= FLUSH_BATCH:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Writes the buffered entries with one commit"""
+        if not self._pending:
+            return
+
+        rows = [(x, *y) for x, y in self._pending.items()]
+        self._pending = {}
+        async with self._db.transaction() as conn:
+            async with conn.executemany(
+                f'INSERT OR REPLACE INTO "{self.table}"("key", "value", "stored_at") '
+                "VALUES(?,?,?)",
+                rows,
+            ):
+                pass
+
+        if time.time() - self._pruned_at > PRUNE_EVERY:
+            await self.prune()
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.flush()
@@ -0,0 +1,119 @@
+"""
+Sends embeds to a channel in as few messages as possible.
+
+Embeds are queued per key (eg. per guild for the mod logs) and a worker
+per key sends them after a short window, up to 10 embeds (and 6000
+characters) per message. One worker per key sends one message at a time,
+so the order is kept and a busy channel waits on its own rate limit
+bucket (discord.py waits out the 429s) without holding up the commands
+that queued the embeds.
+"""
+
+import asyncio
+import collections
+import contextlib
+from typing import Awaitable, Callable, Hashable, Optional
+
+import discord
+
+FLUSH_WINDOW = 1.0  # seconds embeds wait for others to share their message
+MAX_EMBEDS = 10  # per message, discord's limit
+MAX_CHARS = 6000  # of all the embeds of a message, discord's limit
+
+
+class ChannelPublisher:
+    def __init__(
+        self,
+        bot,
+        resolve: Callable[[Hashable], Awaitable[Optional[discord.abc.Messageable]]],
+        *,
+        window: float = FLUSH_WINDOW,
+    ):
+        self.bot = bot
+        self.window = window
+        self._resolve = resolve  # key -> the channel to send to, or None
+        self._queues = {}  # key -> deque of embeds
+        self._workers = {}  # key -> task
+        self._channels = {}  # key -> channel, resolved once
+        self._closing = asyncio.Event()
+        bot.add_listener(self.on_guild_channel_delete)
+
+    def publish(self, key: Hashable, embed: discord.Embed) -> None:
+        """Queue an embed, it is sent within `window` seconds"""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = collections.deque()
+        queue.append(embed)
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key))
+
+    async def close(self) -> None:
+        """Send everything still queued"""
+        self._closing.set()
+        if self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def _work(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._closing.wait(), self.window)
+
+            while queue:
+                await self._send(key, self._take(queue))
+        except Exception as e:
+            self.bot.logger.error(f"Could not publish to {key}: {e!r}")
+        finally:
+            del self._workers[key]
+            if queue:  # queued while the error was handled
+                self._workers[key] = asyncio.create_task(self._work(key))
+            else:
+                del self._queues[key]
+
+    @staticmethod
+    def _take(queue: collections.deque) -> list:
+        batch, size = [], 0
+        while queue and len(batch) < MAX_EMBEDS:
+            if batch and size + len(queue[0]) > MAX_CHARS:
+                break
+            embed = queue.popleft()
+            batch.append(embed)
+            size += len(embed)
+
+        return batch
+
+    async def _channel(self, key: Hashable):
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = await self._resolve(key)
+            if channel is not None:
+                self._channels[key] = channel
+
+        return channel
+
+    def forget(self, key: Hashable) -> None:
+        """Resolve the channel of a key again, eg. when its setting changed"""
+        self._channels.pop(key, None)
+
+    async def _send(self, key: Hashable, embeds: list) -> None:
+        for _ in range(2):  # once more when the channel was deleted
+            channel = await self._channel(key)
+            if channel is None:
+                return  # not set up, or it does not exist anymore
+
+            try:
+                await channel.send(embeds=embeds)
+                return
+            except discord.NotFound:
+                # deleted, resolve it again in case the setting changed
+                self.forget(key)
+            except discord.HTTPException as e:
+                self.bot.logger.warning(
+                    f"Could not send {len(embeds)} embed(s) to {channel.id}: {e}"
+                )
+                return
+
+    async def on_guild_channel_delete(self, channel):
+        for key in [x for x, y in self._channels.items() if y.id == channel.id]:
+            self.forget(key)
@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+from typing import Iterable, Optional
+
+import aiosqlite
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),  # readers no longer wait for the writer
+    ("synchronous", "NORMAL"),  # fsync on checkpoints only, safe with WAL
+    ("cache_size", -16_000),  # KiB of page cache per connection
+    ("mmap_size", 64 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5_000),  # ms to wait on a lock held by another process
+)
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+READERS = 2  # read only connections per database
+
+
+class Database:
+    """
+    A sqlite database with one write connection and a small pool of read
+    connections, all opened in WAL mode with the pragmas above.
+
+    Reads (`fetchone`/`fetchall`) are served from the pool, so they never
+    queue behind writes on the writer's thread. Cursors are always closed
+    before a method returns.
+    """
+
+    def __init__(self, path: str, *, readers: int = READERS):
+        self.path = path
+        self._readers_count = 0 if path == ":memory:" else readers
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers = asyncio.Queue()
+        self._write_lock = asyncio.Lock()
+
+    async def _open(self, *, read_only: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self.path, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        for pragma, value in PRAGMAS:
+            if read_only and pragma == "journal_mode":
+                continue  # persistent, set by the writer
+            await conn.execute(f"PRAGMA {pragma} = {value}")
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    async def connect(self) -> "Database":
+        self._writer = await self._open()
+        for _ in range(self._readers_count):
+            self._readers.put_nowait(await self._open(read_only=True))
+        return self
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+        while not self._readers.empty():
+            await self._readers.get_nowait().close()
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        """Borrow a read connection from the pool"""
+        if not self._readers_count:
+            yield self._writer
+            return
+
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """
+        Exclusive use of the writer, committed on success and rolled back
+        on error. Use the yielded connection for every statement inside.
+        """
+        async with self._write_lock:
+            await self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    # ------------ READS ------------
+
+    async def fetchone(self, sql: str, params: Iterable = ()):
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, params: Iterable = ()) -> list:
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def table_exists(self, name: str) -> bool:
+        return bool(
+            await self.fetchone(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (name,),
+            )
+        )
+
+    # ------------ WRITES ------------
+
+    # each one commits (or rolls back on error) before letting go of the
+    # writer, so no implicit transaction is left open for a `transaction()`
+    # to run into. Several statements that belong together go in a
+    # `transaction()` instead
+
+    @contextlib.asynccontextmanager
+    async def _autocommit(self):
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    async def execute(self, sql: str, params: Iterable = ()) -> int:
+        """Runs and commits a statement, returns the affected row count"""
+        async with self._autocommit() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return cursor.rowcount
+
+    async def executemany(self, sql: str, rows: Iterable) -> None:
+        async with self._autocommit() as conn:
+            async with conn.executemany(sql, rows):
+                pass
+
+    async def executescript(self, script: str) -> None:
+        async with self._autocommit() as conn:
+            async with conn.executescript(script):
+                pass
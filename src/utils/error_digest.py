@@ -0,0 +1,174 @@
+"""
+Sends the bot's errors to the console channel without flooding it.
+
+Errors are fingerprinted by their type and the (file, function) of every
+frame of their traceback, so the same bug hit again and again, eg. while
+an API is down, is one fingerprint. The first occurrence is sent right
+away with the traceback as a text file, the next ones are only counted
+and go out together in one digest message every `interval` seconds.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import time
+import traceback
+from typing import Optional
+
+import discord
+
+DIGEST_INTERVAL = 300  # seconds between two digests
+FORGET_AFTER = (
+    3600  # seconds, a fingerprint not seen for this long is sent in full again
+)
+DIGEST_FIELDS = 25  # most fingerprints in one digest, the embed field limit
+
+
+def fingerprint(error: BaseException) -> str:
+    """Same type raised from the same stack, same fingerprint"""
+    frames = traceback.extract_tb(error.__traceback__)
+    parts = [type(error).__module__, type(error).__qualname__] + [
+        f"{os.path.basename(x.filename)}:{x.name}" for x in frames
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:10]
+
+
+def traceback_file(text: str, fp: str) -> discord.File:
+    return discord.File(io.BytesIO(text.encode()), filename=f"traceback-{fp}.txt")
+
+
+def _context_summary(context: Optional[discord.Embed]) -> str:
+    if context is None:
+        return "no context"
+
+    def flat(text: str) -> str:
+        return " ".join(text.replace("`", "").split())
+
+    parts = [flat(context.description or "")]
+    parts.extend(f"{x.name}: {flat(x.value)[:80]}" for x in context.fields)
+    return " | ".join(x for x in parts if x)[:300]
+
+
+class _Seen:
+    __slots__ = ("error", "total", "pending", "first", "last", "context")
+
+    def __init__(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"[:200]
+        self.total = 1
+        self.pending = 0  # occurrences since the last message about it
+        self.first = self.last = time.time()
+        self.context = None  # of the last occurrence
+
+
+class ErrorDigest:
+    def __init__(self, bot, *, interval: float = DIGEST_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self._seen = {}  # fingerprint -> _Seen
+        self._task = None
+
+    async def report(
+        self, error: BaseException, context: Optional[discord.Embed] = None
+    ) -> None:
+        """Logs an error, sends it to the console the first time it is seen"""
+        fp = fingerprint(error)
+        text = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+        print(text)
+        self.bot.logger.error(f"[{fp}] {text}")
+
+        self._forget_old()
+        seen = stale = self._seen.get(fp)
+        if seen is not None and seen.last < time.time() - FORGET_AFTER:
+            seen = None  # quiet for long enough, sent in full again
+        else:
+            stale = None
+        if seen is not None:
+            seen.total += 1
+            seen.pending += 1
+            seen.last = time.time()
+            seen.context = context
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._send_digest_later())
+            return
+
+        # known while it is being sent, so the repeats meanwhile are counted,
+        # forgotten again (or the stale one back) when it could not be sent so
+        # the next one is sent
+        seen = self._seen[fp] = _Seen(error)
+        if stale is not None and stale.pending:
+            seen.pending = stale.pending  # still owed to a digest
+            seen.total += stale.total
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._send_digest_later())
+        embed = discord.Embed(
+            title="Error",
+            description=f"```py\n{type(error).__name__}: {str(error)[:1800]}\n```",
+            color=discord.Color.red(),
+        )
+        embed.set_footer(
+            text=f"Fingerprint {fp}, repeats are counted in a digest every "
+            f"{self.interval // 60:.0f} minutes"
+        )
+        embeds = [embed] if context is None else [embed, context]
+        try:
+            await self.bot.console.send(embeds=embeds, file=traceback_file(text, fp))
+        except Exception as e:
+            if self._seen.get(fp) is seen:
+                if stale is not None:
+                    self._seen[fp] = stale
+                else:
+                    del self._seen[fp]
+            self.bot.logger.error(f"Could not send error {fp} to the console: {e!r}")
+
+    async def _send_digest_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        await self.send_digest()
+
+    def _forget_old(self) -> None:
+        cutoff = time.time() - FORGET_AFTER
+        for fp in [
+            x for x, y in self._seen.items() if y.last < cutoff and not y.pending
+        ]:
+            del self._seen[fp]
+
+    async def send_digest(self) -> None:
+        """One message with the errors that happened again since the last one"""
+        self._forget_old()
+        pending = sorted(
+            ((x, y) for x, y in self._seen.items() if y.pending),
+            key=lambda x: x[1].pending,
+            reverse=True,
+        )
+        if not pending:
+            return
+
+        embed = discord.Embed(
+            title="Error digest",
+            description=f"{sum(y.pending for _, y in pending)} more error(s) "
+            f"in the last {self.interval // 60:.0f} minutes",
+            color=discord.Color.red(),
+        )
+        for fp, seen in pending[:DIGEST_FIELDS]:
+            embed.add_field(
+                name=f"{fp} x{seen.pending} ({seen.total} in total)",
+                value=f"`{seen.error}`\n**Last:** {_context_summary(seen.context)}"[
+                    :1024
+                ],
+                inline=False,
+            )
+        if len(pending) > DIGEST_FIELDS:
+            embed.set_footer(text=f"and {len(pending) - DIGEST_FIELDS} more")
+
+        # counted only once sent, the repeats during the send stay pending
+        sent = [(fp, seen.pending) for fp, seen in pending]
+        try:
+            await self.bot.console.send(embed=embed)
+        except Exception as e:
+            self.bot.logger.error(f"Could not send the error digest: {e!r}")
+            return
+        for fp, count in sent:
+            if (seen := self._seen.get(fp)) is not None:
+                seen.pending = max(seen.pending - count, 0)
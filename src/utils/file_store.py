@@ -0,0 +1,390 @@
+"""
+Storage of the /file commands, with the disk I/O off the event loop.
+
+A file is a list of chunks, each chunk a blob named by the sha256 of its
+content under `<root>/objects/`, so the same content is stored once
+whatever the number of files it is in (blobs are reference counted) and
+an append only writes the new chunk. Blobs are zlib compressed when that
+saves space. The index, `files.sqlite`, holds every file's name, owner,
+size, mtime and hash; the hash of a file chains the hashes of its chunks,
+`sha256(previous hash + chunk hash)`, so it is kept up to date by an
+append without reading the file back. Only a file's owner changes it, so
+the quota a write is checked against is always the writer's own.
+
+Blob files are only created and removed inside a write transaction of
+the index, which sqlite serialises across processes too, so a blob that
+just lost its last reference is not removed under a write reusing it. A
+new blob is on disk before its row is inserted; when the write fails or
+is cancelled the transaction rolls back and the blob is removed again,
+unless another write referenced it in the meantime.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+FILES_ROOT = "./assets/files"
+QUOTA = 1_000_000  # bytes of files a user may own, 0 for no limit
+COMPRESS_MIN = 256  # bytes, smaller blobs are stored as they are
+COMPRESS_RATIO = 0.9  # compressed blobs are kept only below this of the size
+
+
+class FileInfo(NamedTuple):
+    name: str
+    owner: int  # 0 for the files imported from the old flat directory
+    size: int
+    mtime: float
+    hash: str
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, used: int, quota: int):
+        super().__init__(f"{used} of {quota} bytes used")
+        self.used = used
+        self.quota = quota
+
+
+class NotOwner(Exception):
+    def __init__(self, owner: int):
+        super().__init__(f"owned by {owner}")
+        self.owner = owner
+
+
+class _Blob(NamedTuple):
+    hash: str
+    size: int
+    body: bytes  # as stored
+    compressed: bool
+
+
+def _pack(data: bytes, compress: bool) -> _Blob:
+    digest = hashlib.sha256(data).hexdigest()
+    if compress and len(data) >= COMPRESS_MIN:
+        body = zlib.compress(data)
+        if len(body) < len(data) * COMPRESS_RATIO:
+            return _Blob(digest, len(data), body, True)
+
+    return _Blob(digest, len(data), data, False)
+
+
+def _chain(previous: str, digest: str) -> str:
+    return hashlib.sha256(f"{previous}{digest}".encode()).hexdigest()
+
+
+def _blob_path(root: str, digest: str) -> str:
+    return os.path.join(root, "objects", digest[:2], digest[2:])
+
+
+def _write_blob(root: str, blob: _Blob) -> None:
+    path = _blob_path(root, blob.hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(blob.body)
+    os.replace(temp, path)  # readers never see half a blob
+
+
+def _read_blobs(root: str, rows: list) -> bytes:
+    parts = []
+    for digest, compressed in rows:
+        with open(_blob_path(root, digest), "rb") as f:
+            body = f.read()
+        parts.append(zlib.decompress(body) if compressed else body)
+
+    return b"".join(parts)
+
+
+def _remove_blobs(root: str, digests: list) -> None:
+    for digest in digests:
+        try:
+            os.remove(_blob_path(root, digest))
+        except FileNotFoundError:
+            pass
+
+
+async def _fetchone(conn, sql: str, params: tuple = ()):
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchone()
+
+
+async def _fetchall(conn, sql: str, params: tuple = ()) -> list:
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchall()
+
+
+async def _execute(conn, sql: str, params: tuple = ()) -> None:
+    async with conn.execute(sql, params):
+        pass
+
+
+async def _ref(conn, root: str, blob: _Blob) -> None:
+    """One more reference to a blob, written to disk if it is new"""
+    if await _fetchone(conn, "SELECT 1 FROM blobs WHERE hash = ?", (blob.hash,)):
+        await _execute(
+            conn, "UPDATE blobs SET refs = refs + 1 WHERE hash = ?", (blob.hash,)
+        )
+        return
+
+    await asyncio.to_thread(_write_blob, root, blob)
+    await _execute(
+        conn,
+        "INSERT INTO blobs(hash, size, stored, compressed, refs) VALUES(?,?,?,?,1)",
+        (blob.hash, blob.size, len(blob.body), blob.compressed),
+    )
+
+
+async def _unref(conn, digests: list) -> list:
+    """One reference less to each blob, returns the ones left unreferenced"""
+    orphans = []
+    for digest in digests:
+        await _execute(
+            conn, "UPDATE blobs SET refs = refs - 1 WHERE hash = ?", (digest,)
+        )
+        (refs,) = await _fetchone(
+            conn, "SELECT refs FROM blobs WHERE hash = ?", (digest,)
+        )
+        if refs <= 0:
+            await _execute(conn, "DELETE FROM blobs WHERE hash = ?", (digest,))
+            orphans.append(digest)
+
+    return orphans
+
+
+async def _put(conn, root: str, name: str, owner: int, blob: _Blob) -> tuple:
+    """
+    Sets the content of a file, returns its FileInfo and the blobs the old
+    content leaves unreferenced
+    """
+    old = [
+        x
+        for (x,) in await _fetchall(
+            conn, "SELECT blob FROM file_chunks WHERE name = ?", (name,)
+        )
+    ]
+    await _execute(conn, "DELETE FROM file_chunks WHERE name = ?", (name,))
+    await _ref(conn, root, blob)  # before the old ones go, they may be the same
+    await _execute(
+        conn,
+        "INSERT INTO file_chunks(name, seq, blob) VALUES(?,0,?)",
+        (name, blob.hash),
+    )
+
+    info = FileInfo(name, owner, blob.size, time.time(), _chain("", blob.hash))
+    await _execute(
+        conn,
+        "INSERT OR REPLACE INTO files(name, owner, size, mtime, hash) VALUES(?,?,?,?,?)",
+        info,
+    )
+
+    return info, await _unref(conn, old)
+
+
+async def import_flat_files(conn, root: str = FILES_ROOT) -> int:
+    """
+    Indexes the files of the old flat `root` directory, owned by no one.
+    Used by the migration creating the index, returns how many there were.
+    """
+
+    def read_all() -> list:
+        if not os.path.isdir(root):
+            return []
+
+        files = []
+        for entry in os.scandir(root):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                with open(entry.path, "rb") as f:
+                    files.append((entry.name, f.read()))
+        return files
+
+    files = await asyncio.to_thread(read_all)
+    for name, data in files:
+        await _put(conn, root, name, 0, await asyncio.to_thread(_pack, data, True))
+
+    return len(files)
+
+
+class FileStore:
+    def __init__(
+        self,
+        db,
+        *,
+        root: str = FILES_ROOT,
+        quota: int = QUOTA,
+        compress: bool = True,
+    ):
+        self.db = db  # a utils.database.Database of files.sqlite
+        self.root = root
+        self.quota = quota
+        self.compress = compress
+
+    # ------------ READS ------------
+
+    async def info(self, name: str) -> Optional[FileInfo]:
+        row = await self.db.fetchone(
+            "SELECT name, owner, size, mtime, hash FROM files WHERE name = ?", (name,)
+        )
+        return FileInfo(*row) if row is not None else None
+
+    async def names(self) -> list:
+        return [
+            x for (x,) in await self.db.fetchall("SELECT name FROM files ORDER BY name")
+        ]
+
+    async def usage(self, owner: int) -> int:
+        """Bytes of files `owner` owns"""
+        (used,) = await self.db.fetchone(
+            "SELECT COALESCE(SUM(size), 0) FROM files WHERE owner = ?", (owner,)
+        )
+        return used
+
+    async def read(self, name: str) -> Optional[bytes]:
+        """The content of a file, None when it does not exist"""
+        for _ in range(2):  # once more when it was rewritten while being read
+            rows = await self.db.fetchall(
+                "SELECT c.blob, b.compressed FROM file_chunks c "
+                "JOIN blobs b ON b.hash = c.blob WHERE c.name = ? ORDER BY c.seq",
+                (name,),
+            )
+            if not rows:
+                return None
+
+            try:
+                return await asyncio.to_thread(_read_blobs, self.root, rows)
+            except FileNotFoundError:
+                continue
+
+        return None
+
+    # ------------ WRITES ------------
+
+    async def _check_quota(self, conn, owner: int, added: int) -> None:
+        if not owner or not self.quota or added <= 0:
+            return
+
+        (used,) = await _fetchone(
+            conn, "SELECT COALESCE(SUM(size), 0) FROM files WHERE owner = ?", (owner,)
+        )
+        if used + added > self.quota:
+            raise QuotaExceeded(used, self.quota)
+
+    @staticmethod
+    def _check_owner(owner: int, user: int, override: bool) -> None:
+        if owner != user and not override:
+            raise NotOwner(owner)
+
+    @contextlib.asynccontextmanager
+    async def _writing(self, blob: _Blob):
+        """A write transaction, removing `blob` from disk when it is rolled back"""
+        try:
+            async with self.db.transaction() as conn:
+                yield conn
+        except (NotOwner, QuotaExceeded):
+            raise  # refused before the blob is written
+        except BaseException:
+            await self._sweep([blob.hash])
+            raise
+
+    async def _sweep(self, orphans: list) -> None:
+        """Removes the blobs of `orphans` that are still not referenced"""
+        if not orphans:
+            return
+
+        async with self.db.transaction() as conn:
+            gone = [
+                x
+                for x in orphans
+                if not await _fetchone(conn, "SELECT 1 FROM blobs WHERE hash = ?", (x,))
+            ]
+            await asyncio.to_thread(_remove_blobs, self.root, gone)
+
+    # only the owner of a file changes it (else NotOwner is raised), so the
+    # quota charged is always the writer's own. `override` is for the bot's
+    # owners, the file then stays its owner's
+
+    async def write(
+        self, name: str, user: int, data: bytes, *, override: bool = False
+    ) -> FileInfo:
+        """
+        Creates a file owned by `user` or replaces one of theirs, raises
+        QuotaExceeded when it does not fit in their quota
+        """
+        blob = await asyncio.to_thread(_pack, data, self.compress)
+
+        async with self._writing(blob) as conn:
+            current = await _fetchone(
+                conn, "SELECT owner, size FROM files WHERE name = ?", (name,)
+            )
+            owner = user
+            if current is not None:
+                owner = current[0]
+                self._check_owner(owner, user, override)
+            await self._check_quota(
+                conn, owner, len(data) - (current[1] if current else 0)
+            )
+            info, orphans = await _put(conn, self.root, name, owner, blob)
+
+        await self._sweep(orphans)
+        return info
+
+    async def append(
+        self, name: str, user: int, data: bytes, *, override: bool = False
+    ) -> Optional[FileInfo]:
+        """Adds `data` as a new chunk of the file, None when it does not exist"""
+        blob = await asyncio.to_thread(_pack, data, self.compress)
+
+        async with self._writing(blob) as conn:
+            current = await _fetchone(
+                conn, "SELECT owner, size, hash FROM files WHERE name = ?", (name,)
+            )
+            if current is None:
+                return None
+            owner, size, previous = current
+            self._check_owner(owner, user, override)
+            await self._check_quota(conn, owner, len(data))
+
+            (seq,) = await _fetchone(
+                conn, "SELECT MAX(seq) + 1 FROM file_chunks WHERE name = ?", (name,)
+            )
+            await _ref(conn, self.root, blob)
+            await _execute(
+                conn,
+                "INSERT INTO file_chunks(name, seq, blob) VALUES(?,?,?)",
+                (name, seq or 0, blob.hash),
+            )
+            info = FileInfo(
+                name, owner, size + len(data), time.time(), _chain(previous, blob.hash)
+            )
+            await _execute(
+                conn,
+                "UPDATE files SET size = ?, mtime = ?, hash = ? WHERE name = ?",
+                (info.size, info.mtime, info.hash, name),
+            )
+
+        return info
+
+    async def delete(self, name: str, user: int, *, override: bool = False) -> bool:
+        """False when there is no such file"""
+        async with self.db.transaction() as conn:
+            current = await _fetchone(
+                conn, "SELECT owner FROM files WHERE name = ?", (name,)
+            )
+            if current is None:
+                return False
+            self._check_owner(current[0], user, override)
+
+            chunks = [
+                x
+                for (x,) in await _fetchall(
+                    conn, "SELECT blob FROM file_chunks WHERE name = ?", (name,)
+                )
+            ]
+            await _execute(conn, "DELETE FROM file_chunks WHERE name = ?", (name,))
+            await _execute(conn, "DELETE FROM files WHERE name = ?", (name,))
+            orphans = await _unref(conn, chunks)
+
+        await self._sweep(orphans)
+        return True
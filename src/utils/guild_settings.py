@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+# Sections of config.yml that can be overridden per guild, None allows every key
+PER_GUILD = {
+    "bot_config": ("mod_action_logs_channel",),
+    "automod_config": None,
+    "welcome_config": None,
+    "goodbye_config": None,
+}
+TRUE_WORDS = ("true", "yes", "on", "enable", "enabled", "1")
+FALSE_WORDS = ("false", "no", "off", "disable", "disabled", "0")
+
+
+def parse_value(default: Any, raw: str) -> Any:
+    """
+    Converts a value typed in a command to the type of the config.yml default.
+    Raises ValueError when it does not fit.
+    """
+    raw = raw.strip()
+
+    if isinstance(default, bool):
+        if raw.lower() in TRUE_WORDS:
+            return True
+        if raw.lower() in FALSE_WORDS:
+            return False
+        raise ValueError(f"`{raw}` is not a true/false value")
+
+    if isinstance(default, (int, float)):
+        try:
+            # channel, user and role mentions are read as their id
+            return type(default)(raw.strip("<#@&!>"))
+        except ValueError:
+            raise ValueError(f"`{raw}` is not a number") from None
+
+    if isinstance(default, list):
+        items = [x.strip() for x in raw.split(",") if x.strip()]
+        return [
+            int(x.strip("<#@&!>")) if x.strip("<#@&!>").isdigit() else x for x in items
+        ]
+
+    return raw
+
+
+class GuildSettings:
+    """
+    Per guild overrides of config.yml, stored one row per key.
+
+    `get` returns the effective settings of a guild, shaped like config.yml
+    (`settings["automod_config"]["caps_threshold"]`). They are loaded from
+    the database on first access and kept in memory until a key of that
+    guild changes, so lookups on the message path are a dict access.
+    The returned dicts are shared, treat them as read only. A change
+    dispatches `on_guild_settings_update(guild_id)`.
+    """
+
+    def __init__(self, bot, db):
+        self.bot = bot
+        self._db = db
+        self._cache = {}  # guild id -> effective settings
+        self._loading = {}  # guild id -> task, so concurrent misses load once
+
+    def defaults(self, section: str) -> dict:
+        config = self.bot.config.get(section) or {}
+        keys = PER_GUILD[section]
+        return {x: y for x, y in config.items() if keys is None or x in keys}
+
+    async def get(self, guild_id: int) -> dict:
+        """The effective settings of a guild"""
+        settings = self._cache.get(guild_id)
+        if settings is not None:
+            return settings
+
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = self._loading[guild_id] = asyncio.create_task(self._load(guild_id))
+            task.add_done_callback(lambda t: self._loaded(guild_id, t))
+
+        return await asyncio.shield(task)
+
+    def _loaded(self, guild_id: int, task: asyncio.Task) -> None:
+        if self._loading.get(guild_id) is not task:
+            return  # invalidated while loading, the next call reloads
+        del self._loading[guild_id]
+        if not task.cancelled() and task.exception() is None:
+            self._cache[guild_id] = task.result()
+
+    async def _load(self, guild_id: int) -> dict:
+        settings = {section: self.defaults(section) for section in PER_GUILD}
+        for section, key, value in await self._db.fetchall(
+            'SELECT "section", "key", "value" FROM guild_settings WHERE guild_id = ?',
+            (guild_id,),
+        ):
+            if section in settings:
+                settings[section][key] = json.loads(value)
+
+        return settings
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        """Drop the cached settings of a guild, or of every guild"""
+        if guild_id is None:
+            self._cache.clear()
+            self._loading.clear()
+        else:
+            self._cache.pop(guild_id, None)
+            self._loading.pop(guild_id, None)
+
+    def validate(self, section: str, key: str, raw: str) -> Any:
+        """Parse a value for a section/key, raises ValueError when it is not allowed"""
+        if section not in PER_GUILD:
+            raise ValueError(f"`{section}` can not be changed per server")
+
+        defaults = self.defaults(section)
+        if key not in defaults:
+            raise ValueError(f"`{key}` is not a setting of `{section}`")
+
+        return parse_value(defaults[key], raw)
+
+    async def set(self, guild_id: int, section: str, key: str, raw: str) -> Any:
+        """Stores an override and returns the parsed value"""
+        value = self.validate(section, key, raw)
+        await self._db.execute(
+            'INSERT OR REPLACE INTO guild_settings("guild_id", "section", "key", "value", "updated_at") '
+            "VALUES(?,?,?,?,?)",
+            (guild_id, section, key, json.dumps(value), time.time()),
+        )
+        self.invalidate(guild_id)
+        self.bot.dispatch("guild_settings_update", guild_id)
+
+        return value
+
+    async def reset(
+        self, guild_id: int, section: str, key: Optional[str] = None
+    ) -> int:
+        """Removes overrides so config.yml applies again, returns how many"""
+        if key is None:
+            deleted = await self._db.execute(
+                "DELETE FROM guild_settings WHERE guild_id = ? AND section = ?",
+                (guild_id, section),
+            )
+        else:
+            deleted = await self._db.execute(
+                "DELETE FROM guild_settings WHERE guild_id = ? AND section = ? AND key = ?",
+                (guild_id, section, key),
+            )
+        self.invalidate(guild_id)
+        self.bot.dispatch("guild_settings_update", guild_id)
+
+        return deleted
+
+    async def overrides(self, guild_id: int) -> list:
+        """(section, key, value) of every override of a guild"""
+        return [
+            (section, key, json.loads(value))
+            for section, key, value in await self._db.fetchall(
+                'SELECT "section", "key", "value" FROM guild_settings '
+                "WHERE guild_id = ? ORDER BY section, key",
+                (guild_id,),
+            )
+        ]
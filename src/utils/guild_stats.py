@@ -0,0 +1,146 @@
+"""
+The numbers behind /server-info and /bot-info, kept up to date from
+gateway events so the commands do not walk the caches or shell out.
+
+Member counts per guild come from `utils.member_index`, this keeps the
+role and channel counters and the total members of this process.
+"""
+
+import platform
+
+import discord
+
+
+def _linux_os_name() -> str:
+    try:
+        with open("/etc/os-release") as f:
+            for line in f:
+                if line.startswith("NAME="):
+                    return line[5:].strip().strip('"')
+    except OSError:
+        pass
+
+    return "Not recognized"
+
+
+def host_facts() -> dict:
+    """What the bot runs on, it does not change while it runs"""
+    kernel = platform.system()
+    os_name = "Not recognized"
+    if kernel == "Windows":
+        os_name = "Windows " + platform.release()
+    if kernel == "Darwin":
+        os_name = "MacOS " + platform.mac_ver()[0]
+    if kernel == "Linux":
+        os_name = _linux_os_name()
+
+    return {
+        "kernel": kernel,
+        "kernel_version": platform.version(),
+        "os_name": os_name,
+        "python_version": platform.python_version(),
+        "discord_version": discord.__version__,
+    }
+
+
+class GuildCounters:
+    __slots__ = (
+        "roles",
+        "bot_roles",
+        "text_channels",
+        "voice_channels",
+        "stage_channels",
+    )
+
+    def __init__(self, guild: discord.Guild):
+        self.roles = self.bot_roles = 0
+        self.text_channels = self.voice_channels = self.stage_channels = 0
+        for role in guild.roles:
+            self.role_changed(role, 1)
+        for channel in guild.channels:
+            self.channel_changed(channel, 1)
+
+    def role_changed(self, role: discord.Role, delta: int) -> None:
+        self.roles += delta
+        if role.is_bot_managed():
+            self.bot_roles += delta
+
+    def channel_changed(self, channel, delta: int) -> None:
+        if isinstance(channel, discord.StageChannel):
+            self.stage_channels += delta
+        elif isinstance(channel, discord.VoiceChannel):
+            self.voice_channels += delta
+        elif isinstance(channel, discord.TextChannel):
+            self.text_channels += delta
+
+
+class GuildStats:
+    def __init__(self, bot):
+        self.bot = bot
+        self.host = host_facts()
+        self.members = 0  # of every guild of this process
+        self._guilds = {}  # guild id -> GuildCounters
+
+        for listener in (
+            self.on_ready,
+            self.on_guild_join,
+            self.on_guild_remove,
+            self.on_guild_available,
+            self.on_member_join,
+            self.on_raw_member_remove,
+            self.on_guild_role_create,
+            self.on_guild_role_delete,
+            self.on_guild_channel_create,
+            self.on_guild_channel_delete,
+        ):
+            bot.add_listener(listener)
+
+    def counters(self, guild: discord.Guild) -> GuildCounters:
+        """The counters of a guild, counted from the cache the first time"""
+        counters = self._guilds.get(guild.id)
+        if counters is None:
+            counters = self._guilds[guild.id] = GuildCounters(guild)
+
+        return counters
+
+    # ------------ EVENTS ------------
+
+    async def on_ready(self):
+        # a new session, the guilds were all sent again
+        self.members = sum(x.member_count or 0 for x in self.bot.guilds)
+
+    async def on_guild_join(self, guild: discord.Guild):
+        self.members += guild.member_count or 0
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.members -= guild.member_count or 0
+        self._guilds.pop(guild.id, None)
+
+    async def on_guild_available(self, guild: discord.Guild):
+        self._guilds.pop(guild.id, None)
+
+    async def on_member_join(self, member: discord.Member):
+        self.members += 1
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.members -= 1
+
+    async def on_guild_role_create(self, role: discord.Role):
+        counters = self._guilds.get(role.guild.id)
+        if counters is not None:
+            counters.role_changed(role, 1)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        counters = self._guilds.get(role.guild.id)
+        if counters is not None:
+            counters.role_changed(role, -1)
+
+    async def on_guild_channel_create(self, channel):
+        counters = self._guilds.get(channel.guild.id)
+        if counters is not None:
+            counters.channel_changed(channel, 1)
+
+    async def on_guild_channel_delete(self, channel):
+        counters = self._guilds.get(channel.guild.id)
+        if counters is not None:
+            counters.channel_changed(channel, -1)
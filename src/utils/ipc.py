@@ -0,0 +1,228 @@
+"""
+Local IPC between the processes started by `cluster.py`.
+
+The launcher runs an `IPCServer` on localhost, every cluster connects an
+`IPCClient` to it. A cluster broadcasts a named command, the server relays
+it to every cluster (the sender included unless `skip_self` is set) and
+answers with {cluster id: {"result": ...} or {"error": ...}}.
+
+Messages are JSON, one per line.
+"""
+
+import asyncio
+import itertools
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+IPC_TIMEOUT = 10  # seconds a broadcast waits for the clusters to answer
+STREAM_LIMIT = 16 * 1024 * 1024  # longest message, eval output can be big
+
+
+async def _send(writer: asyncio.StreamWriter, payload: dict) -> None:
+    writer.write(json.dumps(payload).encode() + b"\n")
+    await writer.drain()
+
+
+async def _receive(reader: asyncio.StreamReader) -> Optional[dict]:
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+class IPCServer:
+    """Runs in the launcher and relays broadcasts between the clusters"""
+
+    def __init__(self, token: str, *, logger=None):
+        self.token = token
+        self.logger = logger
+        self._server = None
+        self._clusters = {}  # cluster id -> writer
+        self._waiting = {}  # nonce -> (future, results, expected cluster ids)
+        self._nonces = itertools.count()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple:
+        """Starts listening, returns the (host, port) the clusters connect to"""
+        self._server = await asyncio.start_server(
+            self._handle, host, port, limit=STREAM_LIMIT
+        )
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in self._clusters.values():
+            writer.close()
+
+    async def _handle(self, reader, writer):
+        hello = await _receive(reader)
+        if not hello or hello.get("token") != self.token:
+            writer.close()
+            return
+
+        cluster_id = hello["cluster"]
+        self._clusters[cluster_id] = writer
+        if self.logger is not None:
+            self.logger.info(f"Cluster {cluster_id} connected to the IPC server")
+
+        try:
+            while (message := await _receive(reader)) is not None:
+                if message["op"] == "broadcast":
+                    asyncio.create_task(self._broadcast(cluster_id, message))
+                elif message["op"] == "response":
+                    self._collect(cluster_id, message)
+        except (ConnectionError, json.JSONDecodeError, asyncio.CancelledError):
+            pass  # the cluster went away or the launcher is shutting down
+        finally:
+            if self._clusters.get(cluster_id) is writer:
+                del self._clusters[cluster_id]
+            writer.close()
+
+    async def _broadcast(self, origin: int, message: dict) -> None:
+        nonce = next(self._nonces)
+        targets = {
+            x: y
+            for x, y in self._clusters.items()
+            if not (message.get("skip_self") and x == origin)
+        }
+        results = {}
+        done = asyncio.get_running_loop().create_future()
+        self._waiting[nonce] = (done, results, set(targets))
+
+        request = {
+            "op": "request",
+            "nonce": nonce,
+            "command": message["command"],
+            "data": message.get("data"),
+        }
+        for cluster_id, writer in targets.items():
+            try:
+                await _send(writer, request)
+            except ConnectionError:
+                results[cluster_id] = {"error": "disconnected"}
+
+        try:
+            if len(results) < len(targets):
+                await asyncio.wait_for(done, message.get("timeout") or IPC_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._waiting[nonce]
+
+        for cluster_id in targets:
+            results.setdefault(cluster_id, {"error": "timed out"})
+
+        writer = self._clusters.get(origin)
+        if writer is not None:
+            await _send(
+                writer,
+                {"op": "reply", "nonce": message["nonce"], "results": results},
+            )
+
+    def _collect(self, cluster_id: int, message: dict) -> None:
+        waiting = self._waiting.get(message["nonce"])
+        if waiting is None:
+            return  # answered after the timeout
+
+        done, results, expected = waiting
+        results[cluster_id] = message["response"]
+        if expected <= set(results) and not done.done():
+            done.set_result(None)
+
+
+class IPCClient:
+    """The connection of one cluster to the launcher"""
+
+    def __init__(self, cluster_id: int, address: tuple, token: str, *, logger=None):
+        self.cluster_id = cluster_id
+        self.address = address
+        self.token = token
+        self.logger = logger
+        self.handlers: Dict[str, Callable[[Any], Awaitable[Any]]] = {}
+        self._writer = None
+        self._listener = None
+        self._waiting = {}  # nonce -> future of the reply
+        self._nonces = itertools.count()
+
+    def register(self, command: str, handler: Callable[[Any], Awaitable[Any]]):
+        """Answer `command` broadcasts with `await handler(data)`"""
+        self.handlers[command] = handler
+
+    async def connect(self) -> None:
+        reader, self._writer = await asyncio.open_connection(
+            *self.address, limit=STREAM_LIMIT
+        )
+        await _send(self._writer, {"cluster": self.cluster_id, "token": self.token})
+        self._listener = asyncio.create_task(self._listen(reader))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _listen(self, reader) -> None:
+        try:
+            while (message := await _receive(reader)) is not None:
+                if message["op"] == "request":
+                    asyncio.create_task(self._answer(message))
+                elif message["op"] == "reply":
+                    future = self._waiting.pop(message["nonce"], None)
+                    if future is not None and not future.done():
+                        future.set_result(message["results"])
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+
+        if self.logger is not None:
+            self.logger.error("Lost the connection to the cluster launcher")
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("IPC connection closed"))
+
+    async def _answer(self, message: dict) -> None:
+        handler = self.handlers.get(message["command"])
+        try:
+            if handler is None:
+                raise LookupError(f"unknown IPC command {message['command']!r}")
+            response = {"result": await handler(message["data"])}
+        except Exception as e:
+            response = {"error": f"{e.__class__.__name__}: {e}"}
+
+        try:
+            await _send(
+                self._writer,
+                {"op": "response", "nonce": message["nonce"], "response": response},
+            )
+        except ConnectionError:
+            pass
+
+    async def broadcast(
+        self,
+        command: str,
+        data: Any = None,
+        *,
+        skip_self: bool = False,
+        timeout: float = IPC_TIMEOUT,
+    ) -> Dict[int, dict]:
+        """
+        Runs a command on every cluster, returns
+        {cluster id: {"result": ...} or {"error": "..."}}
+        """
+        nonce = next(self._nonces)
+        future = self._waiting[nonce] = asyncio.get_running_loop().create_future()
+        await _send(
+            self._writer,
+            {
+                "op": "broadcast",
+                "nonce": nonce,
+                "command": command,
+                "data": data,
+                "skip_self": skip_self,
+                "timeout": timeout,
+            },
+        )
+        try:
+            results = await asyncio.wait_for(future, timeout + 1)
+        finally:
+            self._waiting.pop(nonce, None)
+
+        return {int(x): y for x, y in sorted(results.items(), key=lambda x: int(x[0]))}
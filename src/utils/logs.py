@@ -0,0 +1,123 @@
+"""
+Logging that does not write to disk on the event loop.
+
+The bot's logger only puts records on a queue, a `QueueListener` thread
+formats them and writes the file. The file is rotated by size or by time
+and the old ones can be gzipped. The format is either the classic text
+line or one JSON object per line, the JSON one carries the `guild`, `cog`,
+`command` and `latency_ms` given with `extra=`:
+
+    logger.info("Ran /ping", extra={"guild": 1, "command": "ping", "latency_ms": 12.5})
+"""
+
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from typing import Optional
+
+TEXT_FORMAT = "%(levelname)s:%(filename)s:%(lineno)d:%(asctime)s:%(message)s"
+CONTEXT_FIELDS = ("guild", "cog", "command", "latency_ms")
+
+DEFAULTS = {
+    "format": "text",
+    "max_bytes": 10_000_000,
+    "rotate_when": None,
+    "backups": 5,
+    "compress": True,
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with the context fields that were given"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["traceback"] = record.exc_text
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the default merges the traceback into the message, keep it apart
+        # for the JSON format. The message is rendered here as the args may
+        # change before the listener gets to them
+        record = logging.makeLogRecord(record.__dict__)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+
+        return record
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def file_handler(filename: str, config: Optional[dict] = None) -> logging.Handler:
+    """The rotating file handler the listener thread writes with"""
+    config = {**DEFAULTS, **(config or {})}
+
+    if config["rotate_when"]:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            filename,
+            when=config["rotate_when"],
+            backupCount=config["backups"],
+            encoding="utf-8",
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            filename,
+            maxBytes=config["max_bytes"] or 0,
+            backupCount=config["backups"],
+            encoding="utf-8",
+        )
+
+    if config["compress"]:
+        handler.namer = lambda name: name + ".gz"
+        handler.rotator = _gzip_rotator
+
+    if config["format"] == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    return handler
+
+
+def queued_logging(
+    logger: logging.Logger, filename: str, config: Optional[dict] = None
+) -> logging.handlers.QueueListener:
+    """
+    Routes `logger` through a queue to a listener thread writing `filename`.
+    The listener is started, stop it when closing so the queue is flushed.
+    """
+    records = queue.SimpleQueue()
+    logger.addHandler(_QueueHandler(records))
+    listener = logging.handlers.QueueListener(
+        records, file_handler(filename, config), respect_handler_level=True
+    )
+    listener.start()
+
+    return listener
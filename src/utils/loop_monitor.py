@@ -0,0 +1,154 @@
+"""
+Finds what blocks the event loop.
+
+`LoopMonitor` measures the loop lag with a ticker that sleeps a fixed
+time and records how late it wakes up, and times every callback the loop
+runs. Callbacks longer than the threshold are recorded with where they
+come from: the cog or util of the coroutine a task was running, else the
+task name (eg. `discord.py: on_message`) or the callback itself.
+
+Timing a callback is two `perf_counter` calls and a comparison, working
+out where it comes from is only done for the slow ones, so it is cheap
+enough to leave on.
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from utils.metrics import LatencyRecorder
+
+SLOW_CALLBACK = 0.1  # seconds, callbacks running longer are recorded
+LAG_TICK = 0.5  # seconds between two lag measurements
+LOG_EVERY = 60  # seconds, a slow place is logged at most this often
+
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _source_name(filename: str) -> Optional[str]:
+    """`cogs/file-system.py` -> `cogs.file-system`, None when not the bot's code"""
+    if not filename.startswith(SOURCE_ROOT):
+        return None
+
+    return os.path.relpath(filename, SOURCE_ROOT)[:-3].replace(os.sep, ".")
+
+
+def _describe_coro(coro) -> Optional[str]:
+    """The innermost coroutine of the bot's code that `coro` is awaiting"""
+    found = None
+    while coro is not None:
+        code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None)
+        if code is None:
+            break
+
+        module = _source_name(code.co_filename)
+        if module is not None:
+            frame = getattr(coro, "cr_frame", None)
+            line = frame.f_lineno if frame is not None else code.co_firstlineno
+            name = getattr(code, "co_qualname", code.co_name)  # 3.11+
+            found = f"{module}: {name}:{line}"
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+    return found
+
+
+def describe_callback(callback) -> str:
+    """Where a loop callback comes from, as precisely as it can be told"""
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        where = _describe_coro(coro)
+        if where is not None:
+            return where
+        return f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopMonitor:
+    def __init__(self, *, threshold: float = SLOW_CALLBACK, logger=None):
+        self.threshold = threshold
+        self.logger = logger
+        self.lag = LatencyRecorder()  # one stage, "lag"
+        self.last_lag = 0.0
+        self._peak_lag = 0.0  # since the last take_peak_lag
+        self.slow = LatencyRecorder()  # stage per place the slow callbacks come from
+        self._logged = {}  # place -> time.monotonic() it was last logged
+        self._ticker = None
+        self._original_run = None
+
+    def start(self) -> None:
+        if self._original_run is None:
+            self._patch()
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick())
+
+    def stop(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+
+    def _patch(self) -> None:
+        # every callback of the loop, task steps included, goes through
+        # Handle._run (TimerHandle inherits it)
+        original = self._original_run = asyncio.Handle._run
+        monitor = self
+        clock = time.perf_counter
+
+        def _run(handle):
+            start = clock()
+            original(handle)
+            took = clock() - start
+            if took >= monitor.threshold:
+                monitor._record(handle._callback, took)
+
+        asyncio.Handle._run = _run
+
+    def _record(self, callback, seconds: float) -> None:
+        try:
+            where = describe_callback(callback)
+        except Exception:
+            where = repr(callback)
+        self.slow.record(where, seconds)
+
+        now = time.monotonic()
+        last = self._logged.get(where)
+        if self.logger is not None and (last is None or now - last > LOG_EVERY):
+            self._logged[where] = now
+            self.logger.warning(
+                f"The event loop was blocked {seconds * 1000:.0f}ms by {where}",
+                extra={"cog": where, "latency_ms": round(seconds * 1000, 1)},
+            )
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_TICK)
+            self.last_lag = max(loop.time() - started - LAG_TICK, 0.0)
+            self._peak_lag = max(self._peak_lag, self.last_lag)
+            self.lag.record("lag", self.last_lag)
+
+    def take_peak_lag(self) -> float:
+        """The worst lag since the last call, for the host sampler"""
+        peak, self._peak_lag = self._peak_lag, 0.0
+        return peak
+
+    def offenders(self, limit: int = 10) -> list:
+        """
+        (place, count, average ms, worst ms) of the places that blocked the
+        loop the longest in total
+        """
+        return sorted(
+            ((x, *y) for x, y in self.slow.summary().items()),
+            key=lambda x: x[2] * x[1],  # the time they blocked the loop in total
+            reverse=True,
+        )[:limit]
+
+    def reset(self) -> None:
+        self.lag.reset()
+        self.slow.reset()
+        self._logged.clear()
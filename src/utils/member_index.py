@@ -0,0 +1,219 @@
+"""
+Per guild member facts the commands need, without keeping every member.
+
+The bot no longer chunks guilds at startup (see `utils.cache_profile`), so
+`guild.members` only holds the members seen since. The first command that
+needs a guild's member list chunks that guild once, the index is built
+from it and then kept current from member join, leave and update events.
+"""
+
+import asyncio
+import datetime
+import heapq
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+
+class GuildIndex:
+    """
+    Member counts and the timed out members of one guild.
+
+    Timeouts are kept in a dict and in a heap ordered by their end, stale
+    heap entries (the timeout changed or was removed) are skipped when they
+    reach the top and the heap is rebuilt once they outnumber the live ones.
+    """
+
+    __slots__ = ("humans", "bots", "timed_out", "_expiry")
+
+    def __init__(self):
+        self.humans = 0
+        self.bots = 0
+        # member id -> (timed out until, str(member))
+        self.timed_out: Dict[int, tuple] = {}
+        self._expiry: List[tuple] = []  # heap of (timed out until, member id)
+
+    def add(self, member) -> None:
+        if member.bot:
+            self.bots += 1
+        else:
+            self.humans += 1
+        self.update(member)
+
+    def remove(self, user) -> None:
+        if user.bot:
+            self.bots = max(self.bots - 1, 0)
+        else:
+            self.humans = max(self.humans - 1, 0)
+        self.clear_timeout(user.id)
+
+    def update(self, member) -> None:
+        if member.is_timed_out():
+            self.set_timeout(member.id, member.timed_out_until, str(member))
+        else:
+            self.clear_timeout(member.id)
+
+    def set_timeout(self, member_id: int, until: datetime.datetime, name: str):
+        if self.timed_out.get(member_id, (None,))[0] == until:
+            return
+
+        self.timed_out[member_id] = (until, name)
+        heapq.heappush(self._expiry, (until, member_id))
+        self._compact()
+
+    def clear_timeout(self, member_id: int) -> None:
+        if self.timed_out.pop(member_id, None) is not None:
+            self._compact()
+
+    def expire(self, now: Optional[datetime.datetime] = None) -> int:
+        """Drops the timeouts that ended, returns how many"""
+        now = now or discord.utils.utcnow()
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            until, member_id = heapq.heappop(self._expiry)
+            if self.timed_out.get(member_id, (None,))[0] == until:
+                del self.timed_out[member_id]
+                expired += 1
+
+        return expired
+
+    def _compact(self) -> None:
+        if len(self._expiry) > 2 * len(self.timed_out) + 64:
+            self._expiry = [
+                (x, member_id) for member_id, (x, _) in self.timed_out.items()
+            ]
+            heapq.heapify(self._expiry)
+
+    def timed_out_count(self) -> int:
+        self.expire()
+        return len(self.timed_out)
+
+    def timed_out_page(self, page: int, per_page: int) -> list:
+        """
+        (member id, until, name) of the `page`th (from 1) group of
+        `per_page` timed out members, the ones whose timeout ends first first
+        """
+        self.expire()
+        end = page * per_page
+        # the heap may hold stale entries, look far enough to find `end` live ones
+        wanted = end + len(self._expiry) - len(self.timed_out)
+        live = [
+            (member_id, until, self.timed_out[member_id][1])
+            for until, member_id in heapq.nsmallest(wanted, self._expiry)
+            if self.timed_out.get(member_id, (None,))[0] == until
+        ]
+
+        return live[end - per_page : end]
+
+
+class MemberIndex:
+    def __init__(self, bot):
+        self.bot = bot
+        self._guilds: Dict[int, GuildIndex] = {}
+        self._seeding: Dict[int, asyncio.Task] = {}
+        self._rebuild = None
+
+        for listener in (
+            self.on_member_join,
+            self.on_raw_member_remove,
+            self.on_member_update,
+            self.on_guild_available,
+            self.on_guild_remove,
+        ):
+            bot.add_listener(listener)
+
+    def peek(self, guild_id: int) -> Optional[GuildIndex]:
+        """The index of a guild if it was built already"""
+        return self._guilds.get(guild_id)
+
+    async def get(self, guild: discord.Guild) -> GuildIndex:
+        """The index of a guild, chunks the guild the first time"""
+        index = self._guilds.get(guild.id)
+        if index is not None:
+            return index
+
+        task = self._seeding.get(guild.id)
+        if task is None:
+            task = self._seeding[guild.id] = asyncio.create_task(self._seed(guild))
+            task.add_done_callback(lambda t: self._seeded(guild.id, t))
+
+        return await asyncio.shield(task)
+
+    def _seeded(self, guild_id: int, task: asyncio.Task) -> None:
+        if self._seeding.get(guild_id) is not task:
+            return  # dropped while seeding, the next call seeds again
+        del self._seeding[guild_id]
+        if not task.cancelled() and task.exception() is None:
+            self._guilds[guild_id] = task.result()
+
+    async def _seed(self, guild: discord.Guild) -> GuildIndex:
+        if not guild.chunked and self.bot.intents.members:
+            # cached, so member updates are dispatched for them from now on
+            await guild.chunk()
+
+        # read after the chunk, members that joined meanwhile are in it
+        index = GuildIndex()
+        for member in guild.members:
+            index.add(member)
+
+        return index
+
+    def rebuild(self, guilds: Iterable[discord.Guild]) -> None:
+        """
+        Builds the index of the given guilds in one background pass, one
+        guild after the other so the chunk requests do not pile up
+        """
+        if self._rebuild is not None and not self._rebuild.done():
+            return
+        self._rebuild = asyncio.create_task(self._rebuild_all(list(guilds)))
+
+    async def _rebuild_all(self, guilds: list) -> None:
+        for guild in guilds:
+            try:
+                await self.get(guild)
+            except Exception as e:
+                self.bot.logger.error(f"Could not index the members of {guild.id}: {e}")
+
+    def record_timeout(
+        self, member: discord.Member, until: Optional[datetime.datetime]
+    ) -> None:
+        """For the bot's own timeouts, `until` None when it was removed"""
+        index = self._guilds.get(member.guild.id)
+        if index is None:
+            return
+        if until is None:
+            index.clear_timeout(member.id)
+        else:
+            index.set_timeout(member.id, until, str(member))
+
+    def drop(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+        self._seeding.pop(guild_id, None)
+
+    # ------------ EVENTS ------------
+
+    async def on_member_join(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.add(member)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # the raw event, members that are not cached leave too
+        index = self._guilds.get(payload.guild_id)
+        if index is not None:
+            index.remove(payload.user)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.timed_out_until == after.timed_out_until:
+            return
+
+        index = self._guilds.get(after.guild.id)
+        if index is not None:
+            index.update(after)
+
+    async def on_guild_available(self, guild: discord.Guild):
+        # a new gateway session starts the member cache over
+        self.drop(guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.drop(guild.id)
@@ -0,0 +1,197 @@
+import asyncio
+import collections
+import contextlib
+import time
+from typing import Callable, NamedTuple, Optional
+
+import psutil
+
+
+class LatencyRecorder:
+    """Keeps count, total and worst latency for named stages of some hot path"""
+
+    def __init__(self):
+        self._stages = {}  # stage -> [count, total seconds, max seconds]
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        entry = self._stages.get(stage)
+        if entry is None:
+            entry = self._stages[stage] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def summary(self) -> dict:
+        """{stage: (count, average ms, max ms)} for every recorded stage"""
+        return {
+            stage: (count, total / count * 1000, worst * 1000)
+            for stage, (count, total, worst) in self._stages.items()
+        }
+
+    def reset(self) -> None:
+        self._stages.clear()
+
+
+class ShardStats(NamedTuple):
+    shard_id: int
+    latency: float  # seconds
+    guilds: int
+    event_rate: float  # guild events per second, over the last minute
+
+
+class EventRates:
+    """
+    Events per key (eg. per shard) over the last `window` seconds.
+
+    Counts go into one slot per second of a ring, so recording is O(1) and
+    the memory per key is fixed however busy it is.
+    """
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self._rings = {}  # key -> ([count per slot], [second of each slot])
+
+    def record(self, key, count: int = 1) -> None:
+        now = int(time.monotonic())
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = ([0] * self.window, [0] * self.window)
+
+        counts, seconds = ring
+        slot = now % self.window
+        if seconds[slot] != now:
+            seconds[slot] = now
+            counts[slot] = 0
+        counts[slot] += count
+
+    def rate(self, key) -> float:
+        """Average events per second of the key over the window"""
+        ring = self._rings.get(key)
+        if ring is None:
+            return 0.0
+
+        now = int(time.monotonic())
+        counts, seconds = ring
+        return (
+            sum(c for c, s in zip(counts, seconds) if now - s < self.window)
+            / self.window
+        )
+
+    def keys(self) -> list:
+        return list(self._rings)
+
+
+class HostSample(NamedTuple):
+    at: float  # time.time()
+    rss: int  # bytes
+    cpu: float  # % of one core used by the process since the last sample
+    loop_lag: float  # seconds, the worst lag the loop monitor saw since the last sample
+    open_files: int  # file descriptors (handles on windows)
+    tasks: int  # asyncio tasks
+    memory_used: int  # bytes, of the whole machine
+    memory_total: int
+
+
+SPARK_BARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values) -> str:
+    """A one line bar chart of the values, eg. ▁▂▅█▃"""
+    values = list(values)
+    if not values:
+        return ""
+
+    low, high = min(values), max(values)
+    spread = (high - low) or 1
+    return "".join(
+        SPARK_BARS[int((x - low) / spread * (len(SPARK_BARS) - 1))] for x in values
+    )
+
+
+class HostSampler:
+    """
+    Samples the process every `interval` seconds into a ring of the last
+    `size` samples, so commands read numbers without calling psutil.
+
+    psutil runs in a thread. The loop lag is not measured here, `lag` is
+    called for it (the bot passes its `LoopMonitor.take_peak_lag`).
+    """
+
+    def __init__(
+        self,
+        interval: float = 10,
+        size: int = 60,
+        *,
+        lag: Optional[Callable[[], float]] = None,
+        logger=None,
+    ):
+        self.interval = interval
+        self.samples = collections.deque(maxlen=size)
+        self._lag = lag
+        self.logger = logger
+        self._process = psutil.Process()
+        self._task = None
+
+    @property
+    def latest(self) -> Optional[HostSample]:
+        return self.samples[-1] if self.samples else None
+
+    def history(self, field: str) -> list:
+        return [getattr(x, field) for x in self.samples]
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def _read_process(self) -> tuple:
+        with self._process.oneshot():
+            rss = self._process.memory_info().rss
+            cpu = self._process.cpu_percent()
+            if hasattr(self._process, "num_fds"):
+                open_files = self._process.num_fds()
+            else:
+                open_files = self._process.num_handles()
+        memory = psutil.virtual_memory()
+
+        return rss, cpu, open_files, memory.used, memory.total
+
+    async def sample(self) -> HostSample:
+        rss, cpu, open_files, used, total = await asyncio.to_thread(self._read_process)
+        sample = HostSample(
+            time.time(),
+            rss,
+            cpu,
+            self._lag() if self._lag is not None else 0.0,
+            open_files,
+            len(asyncio.all_tasks()),
+            used,
+            total,
+        )
+        self.samples.append(sample)
+
+        return sample
+
+    async def _run(self) -> None:
+        failing = None  # repr of the last error, it is only logged once in a row
+        while True:
+            try:
+                await self.sample()
+                failing = None
+            except Exception as e:  # eg. psutil.AccessDenied, try again next time
+                if self.logger is not None and repr(e) != failing:
+                    self.logger.warning(f"Could not sample the host: {e!r}")
+                failing = repr(e)
+
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,368 @@
+import asyncio
+import json
+import logging
+import random
+import string
+import time
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional, Union
+
+import yaml
+
+from utils.action_logger import ModLogs
+from utils.file_store import import_flat_files
+
+COPY_BATCH = 5_000  # rows read and written per step of a data migration
+WARN_ID_ALPHABET = string.ascii_letters + string.digits
+CONFIG_FILE = "../config.yml"  # relative to src, like the bot's
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # a sql script, or a coroutine function taking the writer connection
+    apply: Union[str, Callable[..., Awaitable[None]]]
+
+
+async def copy_in_batches(
+    conn,
+    select: str,
+    insert: str,
+    convert: Callable[[tuple], Iterable[tuple]],
+    *,
+    batch: int = COPY_BATCH,
+) -> int:
+    """
+    Streams the rows of `select` through `convert` into `insert`.
+
+    Source rows are fetched `batch` at a time and written with one
+    `executemany` per batch, so memory stays flat whatever the table size
+    and the event loop gets a turn between batches. Returns the number of
+    rows written.
+    """
+    copied = 0
+    async with conn.execute(select) as cursor:
+        while True:
+            rows = await cursor.fetchmany(batch)
+            if not rows:
+                break
+
+            converted = [new for row in rows for new in convert(row)]
+            async with conn.executemany(insert, converted):
+                pass
+            copied += len(converted)
+            await asyncio.sleep(0)
+
+    return copied
+
+
+async def _table_exists(conn, name: str) -> bool:
+    async with conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ) as cursor:
+        return await cursor.fetchone() is not None
+
+
+# ------------ action-logs.sqlite ------------
+
+
+async def _copy_action_blobs(conn):
+    """One row per action out of the old per-user `moderation_actions` blobs"""
+    if not await _table_exists(conn, "moderation_actions"):
+        return
+
+    await copy_in_batches(
+        conn,
+        "SELECT user_id, actions FROM moderation_actions ORDER BY rowid",
+        # mod_actions as of this migration, guild_id comes with the next ones
+        'INSERT INTO mod_actions("user_id", "action", "reason", "moderator", "at", "extra") '
+        "VALUES(?,?,?,?,?,?)",
+        lambda row: (
+            ModLogs._to_row(None, row[0], data)[1:]
+            for data in json.loads(row[1] or "[]")
+        ),
+    )
+    async with conn.execute("DROP TABLE moderation_actions"):
+        pass
+
+
+def _legacy_guild_id() -> Optional[int]:
+    """
+    The server the bot served before it could serve several, its rows
+    were recorded without a guild id
+    """
+    try:
+        with open(CONFIG_FILE) as f:
+            return yaml.safe_load(f)["bot_config"]["guild_id"]
+    except (OSError, KeyError, TypeError, yaml.YAMLError):
+        return None
+
+
+def _add_guild_id(table: str):
+    async def apply(conn):
+        async with conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "guild_id" INTEGER'):
+            pass
+
+        guild_id = _legacy_guild_id()
+        if guild_id is None:
+            logger.warning(
+                f"No bot_config.guild_id in {CONFIG_FILE}, the existing rows of "
+                f"{table} are not shown in any server"
+            )
+            return
+        async with conn.execute(
+            f'UPDATE "{table}" SET "guild_id" = ? WHERE "guild_id" IS NULL', (guild_id,)
+        ):
+            pass
+
+    return apply
+
+
+ACTION_LOGS = (
+    Migration(
+        1,
+        "create mod_actions",
+        """
+        CREATE TABLE IF NOT EXISTS "mod_actions" (
+            "id"        INTEGER PRIMARY KEY AUTOINCREMENT,
+            "user_id"   INTEGER NOT NULL,
+            "action"    TEXT NOT NULL,
+            "reason"    TEXT,
+            "moderator" INTEGER,
+            "at"        REAL NOT NULL,
+            "extra"     TEXT
+        );
+        CREATE INDEX IF NOT EXISTS "mod_actions_user_at" ON "mod_actions" ("user_id", "at");
+        CREATE INDEX IF NOT EXISTS "mod_actions_moderator_at" ON "mod_actions" ("moderator", "at");
+        CREATE INDEX IF NOT EXISTS "mod_actions_action" ON "mod_actions" ("action");
+        """,
+    ),
+    Migration(2, "copy moderation_actions blobs", _copy_action_blobs),
+    Migration(3, "add mod_actions.guild_id", _add_guild_id("mod_actions")),
+    Migration(
+        4,
+        "index mod_actions by guild",
+        """
+        DROP INDEX IF EXISTS "mod_actions_user_at";
+        CREATE INDEX IF NOT EXISTS "mod_actions_guild_user_at" ON "mod_actions" ("guild_id", "user_id", "at");
+        """,
+    ),
+)
+
+# ------------ warns.sqlite ------------
+
+
+def _new_warn_id(taken: set) -> str:
+    while True:
+        warn_id = "".join(random.choices(WARN_ID_ALPHABET, k=10))
+        if warn_id not in taken:
+            return warn_id
+
+
+async def _copy_warn_blobs(conn):
+    """One row per warning out of the old per-user `warns` blobs"""
+    if not await _table_exists(conn, "warns"):
+        return
+
+    # the old ids were only unique per user, a colliding one gets a new id
+    async with conn.execute("SELECT warn_id FROM warnings") as cursor:
+        taken = {x for (x,) in await cursor.fetchall()}
+    rekeyed = []
+
+    def convert(row):
+        for warn in json.loads(row[1] or "[]"):
+            warn_id = warn["id"]
+            if warn_id in taken:
+                warn_id = _new_warn_id(taken)
+                rekeyed.append((row[0], warn["id"], warn_id))
+            taken.add(warn_id)
+            # the old format has no timestamps, rowid keeps their order
+            yield (warn_id, row[0], warn.get("reason"), warn.get("moderator"), 0)
+
+    await copy_in_batches(
+        conn,
+        "SELECT user_id, warn_data FROM warns ORDER BY rowid",
+        "INSERT INTO warnings(warn_id, user_id, reason, moderator, created_at) VALUES(?,?,?,?,?)",
+        convert,
+    )
+    async with conn.execute("DROP TABLE warns"):
+        pass
+
+    for user_id, old, new in rekeyed:
+        logger.warning(f"Warning {old} of user {user_id} was taken, renamed to {new}")
+
+
+WARNS = (
+    Migration(
+        1,
+        "create warnings",
+        """
+        CREATE TABLE IF NOT EXISTS "warnings" (
+            "warn_id"    TEXT NOT NULL,
+            "user_id"    INTEGER NOT NULL,
+            "reason"     TEXT,
+            "moderator"  INTEGER,
+            "created_at" REAL NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS "warnings_warn_id" ON "warnings" ("warn_id");
+        CREATE INDEX IF NOT EXISTS "warnings_user_created" ON "warnings" ("user_id", "created_at");
+        """,
+    ),
+    Migration(2, "copy warns blobs", _copy_warn_blobs),
+    Migration(3, "add warnings.guild_id", _add_guild_id("warnings")),
+    Migration(
+        4,
+        "index warnings by guild",
+        """
+        DROP INDEX IF EXISTS "warnings_user_created";
+        CREATE INDEX IF NOT EXISTS "warnings_guild_user_created" ON "warnings" ("guild_id", "user_id", "created_at");
+        """,
+    ),
+)
+
+
+# ------------ guild-settings.sqlite ------------
+
+GUILD_SETTINGS = (
+    Migration(
+        1,
+        "create guild_settings",
+        """
+        CREATE TABLE IF NOT EXISTS "guild_settings" (
+            "guild_id"   INTEGER NOT NULL,
+            "section"    TEXT NOT NULL,
+            "key"        TEXT NOT NULL,
+            "value"      TEXT NOT NULL,
+            "updated_at" REAL NOT NULL,
+            PRIMARY KEY ("guild_id", "section", "key")
+        ) WITHOUT ROWID;
+        """,
+    ),
+)
+
+# ------------ automod-cache.sqlite ------------
+
+AUTOMOD_CACHE = (
+    Migration(
+        1,
+        "create nsfw_verdicts",
+        """
+        CREATE TABLE IF NOT EXISTS "nsfw_verdicts" (
+            "key"       TEXT PRIMARY KEY,
+            "value"     TEXT,
+            "stored_at" REAL
+        );
+        CREATE INDEX IF NOT EXISTS "nsfw_verdicts_stored_at" ON "nsfw_verdicts" ("stored_at");
+        """,
+    ),
+)
+
+# ------------ files.sqlite ------------
+
+FILES = (
+    Migration(
+        1,
+        "create files, file_chunks and blobs",
+        """
+        CREATE TABLE IF NOT EXISTS "files" (
+            "name"  TEXT PRIMARY KEY,
+            "owner" INTEGER NOT NULL,
+            "size"  INTEGER NOT NULL,
+            "mtime" REAL NOT NULL,
+            "hash"  TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS "files_owner" ON "files" ("owner");
+        CREATE TABLE IF NOT EXISTS "file_chunks" (
+            "name" TEXT NOT NULL,
+            "seq"  INTEGER NOT NULL,
+            "blob" TEXT NOT NULL,
+            PRIMARY KEY ("name", "seq")
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS "blobs" (
+            "hash"       TEXT PRIMARY KEY,
+            "size"       INTEGER NOT NULL,
+            "stored"     INTEGER NOT NULL,
+            "compressed" INTEGER NOT NULL,
+            "refs"       INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """,
+    ),
+    Migration(2, "import the flat assets/files", import_flat_files),
+)
+
+
+# every database of the bot, with its migrations
+DATABASES = {
+    "./data/action-logs.sqlite": ACTION_LOGS,
+    "./data/warns.sqlite": WARNS,
+    "./data/guild-settings.sqlite": GUILD_SETTINGS,
+    "./data/automod-cache.sqlite": AUTOMOD_CACHE,
+    "./data/files.sqlite": FILES,
+}
+
+
+# ------------ RUNNER ------------
+
+
+async def schema_version(db) -> int:
+    if not await db.table_exists("schema_version"):
+        return 0
+
+    (version,) = await db.fetchone('SELECT MAX("version") FROM schema_version')
+    return version or 0
+
+
+async def migrate(db, migrations: Iterable[Migration], logger=None) -> int:
+    """
+    Brings a database up to the newest migration and returns its version.
+
+    Each pending migration runs in its own transaction together with the
+    `schema_version` row that records it, so a migration is either fully
+    applied or not at all and an interrupted upgrade resumes where it
+    stopped on the next start.
+    """
+    await db.executescript(
+        'CREATE TABLE IF NOT EXISTS "schema_version" ('
+        '"version" INTEGER PRIMARY KEY, "name" TEXT, "applied_at" REAL)'
+    )
+    current = await schema_version(db)
+
+    for migration in sorted(migrations, key=lambda x: x.version):
+        if migration.version <= current:
+            continue
+
+        started = time.perf_counter()
+        async with db.transaction() as conn:
+            # another process may have applied it since the check above,
+            # BEGIN IMMEDIATE holds the write lock from here on
+            async with conn.execute(
+                'SELECT MAX("version") FROM schema_version'
+            ) as cursor:
+                (applied,) = await cursor.fetchone()
+            if (applied or 0) >= migration.version:
+                current = applied
+                continue
+
+            if isinstance(migration.apply, str):
+                # executescript would commit the open transaction first
+                for statement in migration.apply.split(";"):
+                    if statement.strip():
+                        async with conn.execute(statement):
+                            pass
+            else:
+                await migration.apply(conn)
+            async with conn.execute(
+                'INSERT INTO schema_version("version", "name", "applied_at") VALUES(?,?,?)',
+                (migration.version, migration.name, time.time()),
+            ):
+                pass
+
+        current = migration.version
+        if logger is not None:
+            logger.info(
+                f"{db.path}: applied migration {migration.version} ({migration.name}) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+    return current
@@ -0,0 +1,86 @@
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+# Regex bank, every pattern the automod needs is compiled into one scanner
+MENTION_PATTERN = r"<@!?(?P<mention>[0-9]{15,20})>"
+URL_PATTERN = r"\b(?P<url>(?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))*(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
+TOKEN_REGEX = re.compile(f"{MENTION_PATTERN}|{URL_PATTERN}", re.IGNORECASE)
+
+INVITE_MARKDOWN = "|*_~>"  # spoilers, bold, ... around a link, not part of its code
+INVITE_DOMAINS = {  # domain -> path prefix in front of the invite code
+    "discord.gg": "/",
+    "discord.com": "/invite/",
+    "discordapp.com": "/invite/",
+    "dis.gd": "/invite/",
+    "dsc.io": "/",
+    "dsc.gg": "/",
+    "invite.gg": "/",
+}
+
+
+class ScanResult(NamedTuple):
+    """Everything the automod rules read from a message's content."""
+
+    urls: tuple
+    invites: tuple  # invite codes
+    mentions: tuple  # mentioned user ids, duplicates kept
+    length: int
+    uppercase: int  # number of uppercase characters
+    word_count: int
+
+    @property
+    def upper_ratio(self) -> float:
+        """Percentage of the characters that are uppercase"""
+        return self.uppercase / self.length * 100 if self.length else 0.0
+
+
+def url_domain(url: str) -> Optional[str]:
+    """Returns the normalised domain of a url, eg. `www.YouTube.com.` -> `youtube.com`"""
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        domain = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not domain:
+        return None
+
+    domain = domain.rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def invite_code(url: str) -> Optional[str]:
+    """Returns the invite code if the url is a discord invite link"""
+    prefix = INVITE_DOMAINS.get(url_domain(url))
+    if prefix is None:
+        return None
+
+    path = urlsplit(url if "://" in url else "http://" + url).path
+    if not path.lower().startswith(prefix) or len(path) <= len(prefix):
+        return None
+    return path[len(prefix) :].split("/")[0].rstrip(INVITE_MARKDOWN) or None
+
+
+def scan(content: str) -> ScanResult:
+    """Tokenizes the message content in a single regex pass"""
+    urls, invites, mentions = [], [], []
+
+    for match in TOKEN_REGEX.finditer(content):
+        if match.group("mention"):
+            mentions.append(int(match.group("mention")))
+            continue
+
+        url = match.group("url")
+        urls.append(url)
+        if code := invite_code(url):
+            invites.append(code)
+
+    return ScanResult(
+        urls=tuple(urls),
+        invites=tuple(invites),
+        mentions=tuple(mentions),
+        length=len(content),
+        uppercase=sum(map(str.isupper, content)),
+        word_count=len(content.split()),
+    )
@@ -0,0 +1,95 @@
+import time
+from collections import Counter, OrderedDict, deque
+from typing import NamedTuple
+
+
+class SpamStats(NamedTuple):
+    """What `SpamIndex.record` knows about an author after a new message."""
+
+    recent: int  # messages sent inside the window, this one included
+    duplicates: int  # messages inside the window with this exact content
+
+
+class _Bucket:
+    __slots__ = ("events", "hashes", "last_seen")
+
+    def __init__(self, capacity: int):
+        self.events = deque(maxlen=capacity)  # (timestamp, content hash)
+        self.hashes = Counter()
+        self.last_seen = 0.0
+
+
+class SpamIndex:
+    """
+    Sliding window of recent messages per (guild, author).
+
+    Each author gets a bounded ring buffer of timestamps and content hashes,
+    so recording a message and checking the author is O(1) amortised and
+    independent of the discord message cache. Authors that went quiet are
+    dropped lazily on the next `record` call.
+    """
+
+    def __init__(self, window: float = 10, capacity: int = 50):
+        self.window = window
+        self.capacity = capacity
+        self._buckets = OrderedDict()  # least recently active author first
+
+    def __len__(self):
+        return len(self._buckets)
+
+    @staticmethod
+    def content_hash(content: str):
+        """Hash of the message content, None for empty (attachment only) messages"""
+        content = " ".join(content.lower().split())
+        return hash(content) if content else None
+
+    def record(self, guild_id: int, author_id: int, content: str) -> SpamStats:
+        """Add a message to the author's window and return their current stats"""
+        now = time.monotonic()
+        cutoff = now - self.window
+        self._expire_idle(cutoff)
+
+        key = (guild_id, author_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.capacity)
+        else:
+            self._buckets.move_to_end(key)
+
+        events, hashes = bucket.events, bucket.hashes
+        while events and events[0][0] < cutoff:
+            _, old_hash = events.popleft()
+            self._forget(hashes, old_hash)
+
+        if len(events) == events.maxlen:  # the ring buffer is about to overwrite
+            self._forget(hashes, events[0][1])
+
+        content_hash = self.content_hash(content)
+        events.append((now, content_hash))
+        if content_hash is not None:
+            hashes[content_hash] += 1
+        bucket.last_seen = now
+
+        return SpamStats(
+            recent=len(events),
+            duplicates=hashes[content_hash] if content_hash is not None else 0,
+        )
+
+    def reset(self, guild_id: int, author_id: int) -> None:
+        """Forget an author's window, eg. after their messages were purged"""
+        self._buckets.pop((guild_id, author_id), None)
+
+    def _expire_idle(self, cutoff: float) -> None:
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.last_seen >= cutoff:
+                break
+            del self._buckets[key]
+
+    @staticmethod
+    def _forget(hashes: Counter, content_hash) -> None:
+        if content_hash is None:
+            return
+        hashes[content_hash] -= 1
+        if hashes[content_hash] <= 0:
+            del hashes[content_hash]
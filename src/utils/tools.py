@@ -1,7 +1,5 @@
 import datetime
-import math
 import re
-import traceback
 
 import discord
 from discord.ext import commands
@@ -43,29 +41,6 @@ def convert_time(arg):
     return res
 
 
-def error_to_embed(bot, error: Exception = None):
-    traceback_text: str = (
-        "".join(traceback.format_exception(type(error), error, error.__traceback__))
-        if error
-        else traceback.format_exc()
-    )
-    print(traceback_text)
-    bot.logger.error(traceback_text)
-
-    length: int = len(traceback_text)
-    chunks: int = math.ceil(length / 1990)
-
-    traceback_texts = [traceback_text[l * 1990 : (l + 1) * 1990] for l in range(chunks)]
-    return [
-        discord.Embed(
-            title="Traceback",
-            description=("```py\n" + text + "\n```"),
-            color=discord.Color.red(),
-        )
-        for text in traceback_texts
-    ]
-
-
 GRAYSCALE_NOICON_REVERT = "https://i.ibb.co/KjDkLQ8/image.png"
 
 
@@ -0,0 +1,109 @@
+from typing import Iterable, Optional
+
+# Characters that are always read as the letter they look like
+LEET_DIGITS = {
+    "0": "o",
+    "1": "i",
+    "3": "e",
+    "4": "a",
+    "5": "s",
+    "6": "g",
+    "7": "t",
+    "8": "b",
+}
+# Symbols are only read as letters when they sit inside a word, so that
+# sentence punctuation ("what the hell!") still acts as a word boundary.
+LEET_INNER_SYMBOLS = {"!": "i", "|": "i", "+": "t", "(": "c"}
+LEET_EDGE_SYMBOLS = {"@": "a", "$": "s"}  # may also end a word, eg. "a$$"
+
+
+def normalise(text: str) -> str:
+    """Lowercase the text and undo common leetspeak substitutions"""
+    text = text.lower()
+    chars = []
+    for index, char in enumerate(text):
+        if char in LEET_DIGITS:
+            char = LEET_DIGITS[char]
+        elif char in LEET_INNER_SYMBOLS or char in LEET_EDGE_SYMBOLS:
+            following = text[index + 1] if index + 1 < len(text) else ""
+            if following.isalnum():
+                char = LEET_INNER_SYMBOLS.get(char) or LEET_EDGE_SYMBOLS[char]
+            elif char in LEET_EDGE_SYMBOLS and chars and chars[-1].isalpha():
+                char = LEET_EDGE_SYMBOLS[char]
+        chars.append(char)
+
+    return "".join(chars)
+
+
+class ProfanityMatcher:
+    """
+    Aho-Corasick automaton over a wordlist.
+
+    The terms are normalised with `normalise` and compiled once, `search`
+    then finds the first whole-word match in a single pass over the text.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]  # (length, term) pairs ending at each state
+        self.terms = set()
+
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _add(self, word: str) -> None:
+        if not isinstance(word, str) or not word.strip():
+            return
+
+        key = normalise(word.strip())
+        state = 0
+        for char in key:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+
+        # when leetspeak variants collide, report the plainly spelled term
+        if not self._output[state] or word.strip().lower() == key:
+            self._output[state] = ((len(key), word.strip()),)
+        self.terms.add(word.strip())
+
+    def _link(self) -> None:
+        """Build the failure links breadth first and merge their outputs"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def search(self, text: str) -> Optional[str]:
+        """Returns the first blacklisted term found in the text, if any"""
+        text = normalise(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        end = len(text)
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for length, term in output[state]:
+                start = index - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (
+                    index + 1 == end or not text[index + 1].isalnum()
+                ):
+                    return term
+
+        return None